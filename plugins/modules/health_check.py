@@ -9,12 +9,23 @@ description:
     - Supports custom headers, timeout, and expected status codes
     - Includes retry logic with configurable delays
     - Can validate response content using regular expressions
+    - Can probe several URLs concurrently and succeed on the first healthy one
 version_added: "1.0.0"
 options:
     url:
-        description: The URL to check
-        required: true
+        description:
+            - The URL to check
+            - Exactly one of I(url) or I(urls) is required
+        required: false
         type: str
+    urls:
+        description:
+            - URLs to check concurrently, for example several replicas of one service
+            - Each attempt succeeds as soon as any of them passes the check
+            - Exactly one of I(url) or I(urls) is required
+        required: false
+        type: list
+        elements: str
     headers:
         description: HTTP headers to send with the request
         required: false
@@ -30,16 +41,40 @@ options:
         required: false
         type: int
         default: 5
+    backoff_factor:
+        description:
+            - Multiplier applied to I(delay_between_tries) after each failed retry
+            - The default of 1 keeps a fixed delay; 2 doubles it every retry
+            - Must be at least 1
+        required: false
+        type: float
+        default: 1
+    max_delay:
+        description:
+            - Upper bound for the delay between retry attempts when backing off (seconds)
+            - Also caps the delay after I(jitter) is applied
+        required: false
+        type: int
+    jitter:
+        description:
+            - Random spread applied to each delay, as a fraction between 0 and 1
+            - For example 0.2 sleeps between 80% and 120% of the computed delay, so many hosts
+              probing one recovering service do not retry in lockstep
+        required: false
+        type: float
+        default: 0
     max_retries:
         description: Maximum number of retry attempts
         required: false
         type: int
         default: 10
     timeout:
-        description: Request timeout (seconds)
+        description:
+            - Request timeout (seconds)
+            - Kept short so a hung endpoint fails fast and the retry loop tries again
         required: false
         type: int
-        default: 10
+        default: 3
     expected_status:
         description: Expected HTTP status code
         required: false
@@ -70,6 +105,14 @@ EXAMPLES = r'''
     delay_between_tries: 10
     timeout: 30
 
+- name: Health check with jittered exponential backoff
+  dai_continuous_testing.utilities.health_check:
+    url: "http://localhost:8080/health"
+    delay_between_tries: 2
+    backoff_factor: 2
+    max_delay: 60
+    jitter: 0.2
+
 - name: Health check with custom headers
   dai_continuous_testing.utilities.health_check:
     url: "http://localhost:8080/api/status"
@@ -77,6 +120,12 @@ EXAMPLES = r'''
       Authorization: "Bearer {{ api_token }}"
       Content-Type: "application/json"
 
+- name: Health check against any of several replicas
+  dai_continuous_testing.utilities.health_check:
+    urls:
+      - "http://app-01:8080/health"
+      - "http://app-02:8080/health"
+
 - name: Health check with content validation
   dai_continuous_testing.utilities.health_check:
     url: "http://localhost:8080/health"
@@ -93,7 +142,7 @@ success:
     type: bool
     returned: always
 url:
-    description: The URL that was checked
+    description: The URL that was checked (the first healthy one when I(urls) is used)
     type: str
     returned: always
 expected_status:
@@ -114,44 +163,34 @@ failed_attempts:
     returned: on success
 '''
 
+import random
+import re
 import time
 import socket
+import ssl
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-try:
-    # python3
-    import urllib.request as urllib_request
-    import urllib.error as urllib_error
-except ImportError:
-    # python2
-    import urllib2 as urllib_request
-    import urllib2 as urllib_error
+import urllib.request as urllib_request
+import urllib.error as urllib_error
 
 from ansible.module_utils.basic import AnsibleModule
 
-def check_server_status(url, headers, expected_status, timeout, expected_regexp):
+# One TLS context shared by every HTTPS probe, so the CA bundle is loaded once per module
+# run; the opener exists only to install it. Connections are not kept alive between probes.
+_SSL_CONTEXT = ssl.create_default_context()
+_OPENER = urllib_request.build_opener(urllib_request.HTTPSHandler(context=_SSL_CONTEXT))
+
+def check_server_status(url, headers, expected_status, timeout=3, expected_regexp=None):
+    """Probe url once; expected_regexp is a compiled pattern or None"""
 
     try:
         req = urllib_request.Request(url, headers=headers)
-        resp = urllib_request.urlopen(req, timeout=timeout)
+        resp = _OPENER.open(req, timeout=timeout)
 
     except urllib_error.HTTPError as e:
-        if e.code == expected_status:
-            return {
-                "msg": "OK",
-                "success": True,
-                "url": url,
-                "expected_status": expected_status,
-                "actual_status": e.code
-            }
-
-        else:
-            return {
-                "msg": 'Expected status %d, actual: %d' % (expected_status, e.code),
-                "success": False,
-                "url": url,
-                "expected_status": expected_status,
-                "actual_status": e.code
-            }
+        # An error status may be the expected one; the HTTPError doubles as the response,
+        # so its status and body go through the same checks below
+        resp = e
 
     except (urllib_error.URLError, socket.error) as e:
         return {
@@ -175,6 +214,18 @@ def check_server_status(url, headers, expected_status, timeout, expected_regexp)
     except:
         content = ""
 
+    if expected_regexp is not None:
+        text = content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+        if not expected_regexp.search(text):
+            return {
+                "msg": 'Expected regexp %s not found in response' % expected_regexp.pattern,
+                "success": False,
+                "url": url,
+                "expected_status": expected_status,
+                "actual_status": resp.getcode(),
+                "content": content
+            }
+
     return {
         "msg": "OK",
         "success": True,
@@ -184,48 +235,111 @@ def check_server_status(url, headers, expected_status, timeout, expected_regexp)
         "content": content
     }
 
+def probe_urls(urls, headers, expected_status, timeout, expected_regexp):
+    """Probe all URLs concurrently and return the first successful result, or the last failure"""
+    if len(urls) == 1:
+        return check_server_status(urls[0], headers, expected_status, timeout, expected_regexp)
+
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    try:
+        futures = [executor.submit(check_server_status, url, headers, expected_status, timeout, expected_regexp)
+                   for url in urls]
+        for future in as_completed(futures):
+            result = future.result()
+            if result["success"]:
+                break
+        return result
+    finally:
+        # Return without joining the slower probes; every URL has its own worker, so they are
+        # already running and finish within their timeout before the interpreter exits
+        executor.shutdown(wait=False)
+
+def retry_delay(attempt, delay_between_tries, backoff_factor, max_delay, jitter):
+    """Return the sleep before retry number attempt (1-based), backed off, jittered and capped"""
+    delay = delay_between_tries
+    for _ in range(attempt - 1):
+        # Stop growing at the cap rather than computing a power that can overflow a float
+        if max_delay is not None and delay >= max_delay:
+            break
+        delay *= backoff_factor
+    if jitter:
+        delay *= random.uniform(1 - jitter, 1 + jitter)
+    if max_delay is not None:
+        delay = min(delay, max_delay)
+    return delay
+
 def main():
     
     module_args = dict(
-        url=dict(required=True, type='str'),
+        url=dict(required=False, type='str'),
+        urls=dict(required=False, type='list', elements='str'),
         headers=dict(required=False, type='dict', default=None),
         initial_delay=dict(required=False, type='int', default=0),
         delay_between_tries=dict(required=False, type='int', default=5),
+        backoff_factor=dict(required=False, type='float', default=1),
+        max_delay=dict(required=False, type='int', default=None),
+        jitter=dict(required=False, type='float', default=0),
         max_retries=dict(required=False, type='int', default=10),
-        timeout=dict(request=False, type='int', default=10),
+        timeout=dict(request=False, type='int', default=3),
         expected_status=dict(request=False, type='int', default=200),
         expected_regexp=dict(request=False, default=None)
     )
     
     module = AnsibleModule(
-        argument_spec=module_args
+        argument_spec=module_args,
+        mutually_exclusive=[['url', 'urls']],
+        required_one_of=[['url', 'urls']]
     )
 
-    url = module.params['url']
+    if module.params['urls'] is not None:
+        urls = module.params['urls']
+        if not urls:
+            module.fail_json(msg='urls must contain at least one URL')
+    else:
+        urls = [module.params['url']]
     headers = module.params['headers'] or {}
     initial_delay = module.params['initial_delay']
     delay_between_tries = module.params['delay_between_tries']
+    backoff_factor = module.params['backoff_factor']
+    max_delay = module.params['max_delay']
+    jitter = module.params['jitter']
     max_retries = module.params['max_retries']
     timeout = module.params['timeout']
     expected_status = module.params['expected_status']
     expected_regexp = module.params['expected_regexp']
 
+    # Compile once up front so a malformed pattern fails the task cleanly before any probe
+    if expected_regexp:
+        try:
+            expected_regexp = re.compile(expected_regexp)
+        except re.error as e:
+            module.fail_json(msg='Invalid expected_regexp %s: %s' % (expected_regexp, e))
+    else:
+        expected_regexp = None
+
+    if not 0 <= jitter < 1:
+        module.fail_json(msg='jitter must be between 0 and 1, got %s' % jitter)
+    if backoff_factor < 1:
+        module.fail_json(msg='backoff_factor must be at least 1, got %s' % backoff_factor)
+    if max_delay is not None and max_delay < 0:
+        module.fail_json(msg='max_delay must not be negative, got %s' % max_delay)
+
     time.sleep(initial_delay)
     
     for attempt in range(max_retries):
         
         if attempt != 0:
-            time.sleep(delay_between_tries)
+            time.sleep(retry_delay(attempt, delay_between_tries, backoff_factor, max_delay, jitter))
         
-        result = check_server_status(
-                url=url, 
+        result = probe_urls(
+                urls=urls, 
                 headers=headers, 
                 timeout=timeout,
                 expected_status=expected_status,
                 expected_regexp=expected_regexp)
         
         if result["success"]:
-            module.exit_json(failed_attempts=attempt)
+            module.exit_json(failed_attempts=attempt, url=result["url"])
     
     else:
         module.fail_json(msg='Maximum attempts reached: ' + result["msg"],
@@ -83,25 +83,52 @@ disk_info:
 
 import os
 import re
+import string
 import subprocess
-import json
+
+try:
+    # orjson parses faster when it is installed; both raise ValueError subclasses
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 from ansible.module_utils.basic import AnsibleModule
 
+_DRIVE_LETTERS = frozenset(string.ascii_uppercase)
+
+# Fixed PowerShell argv; each query only appends its script. CREATE_NO_WINDOW keeps a
+# console window from flashing up on Windows and is absent (0) elsewhere
+_PS_ARGV = ('powershell.exe', '-NoProfile', '-NonInteractive', '-Command')
+_PS_CREATIONFLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
 def parse_drive_letter(drive_input):
     """Parse and validate drive letter input"""
     if not drive_input:
         raise ValueError("Drive letter cannot be empty")
     
-    # Remove colon if present and convert to uppercase
-    drive_letter = str(drive_input).rstrip(':').upper()
+    drive_input = str(drive_input)
+    drive_letter = drive_input[0].upper()
     
-    # Validate single letter
-    if len(drive_letter) != 1 or not drive_letter.isalpha():
+    # Validate a single A-Z letter, optionally followed by one colon
+    if drive_letter not in _DRIVE_LETTERS or drive_input[1:] not in ('', ':'):
         raise ValueError(f"Invalid drive letter: {drive_input}")
     
     return drive_letter
 
+def _drive_exists(drive_letter):
+    """Return False only when Windows reports no such drive letter, True when unsure"""
+    if os.name != 'nt':
+        return True
+    try:
+        import ctypes
+        # Bitmask of assigned letters, including empty optical and mapped network drives
+        mask = ctypes.windll.kernel32.GetLogicalDrives()
+    except (ImportError, AttributeError, OSError):
+        return True
+    if not mask:
+        return True
+    return bool(mask & (1 << (ord(drive_letter) - ord('A'))))
+
 def get_disk_info(drive_letter):
     """Get disk information for a Windows drive letter using PowerShell"""
     try:
@@ -113,16 +140,25 @@ def get_disk_info(drive_letter):
             'drive_letter': drive_letter
         }
     
-    # PowerShell command to get comprehensive disk information
+    # Skip starting PowerShell for a letter that is not assigned at all
+    if not _drive_exists(parsed_drive):
+        return {
+            'success': False,
+            'msg': f'Drive {parsed_drive}: not found',
+            'drive_letter': parsed_drive
+        }
+    
+    return _query_disk_info(parsed_drive)
+
+def _query_disk_info(parsed_drive):
+    """Run the PowerShell disk info query for an already validated drive letter"""
+    # PowerShell command to get comprehensive disk information; WMI filters to the
+    # requested drive and its partition so only those rows are returned
     ps_command = f'''
-    Get-WmiObject -Class Win32_LogicalDisk | Where-Object {{ $_.DeviceID -eq "{parsed_drive}:" }} | 
+    Get-WmiObject -Class Win32_LogicalDisk -Filter "DeviceID='{parsed_drive}:'" | 
     ForEach-Object {{
         $disk = $_
-        $partition = Get-WmiObject -Class Win32_LogicalDiskToPartition | Where-Object {{ $_.Dependent -match $disk.DeviceID }}
-        $physicalDisk = $null
-        if ($partition) {{
-            $physicalDisk = Get-WmiObject -Class Win32_DiskPartition | Where-Object {{ $_.DeviceID -eq $partition.Antecedent.Split('=')[1].Trim('"') }}
-        }}
+        $physicalDisk = Get-WmiObject -Query "ASSOCIATORS OF {{Win32_LogicalDisk.DeviceID='{parsed_drive}:'}} WHERE AssocClass=Win32_LogicalDiskToPartition" | Select-Object -First 1
         
         [PSCustomObject]@{{
             DriveLetter = $disk.DeviceID.Replace(':', '')
@@ -143,10 +179,12 @@ def get_disk_info(drive_letter):
     
     try:
         result = subprocess.run(
-            ['powershell.exe', '-Command', ps_command],
+            [*_PS_ARGV, ps_command],
             capture_output=True,
             text=True,
-            timeout=30
+            timeout=30,
+            shell=False,
+            creationflags=_PS_CREATIONFLAGS
         )
         
         if result.returncode != 0:
@@ -156,9 +194,18 @@ def get_disk_info(drive_letter):
                 'drive_letter': parsed_drive
             }
         
-        # Parse JSON output
+        # Parse JSON output; ConvertTo-Json prints nothing when no drive matched, and
+        # output that does not open a JSON array or object is rejected without parsing
+        output = result.stdout.strip()
+        if output and output[0] not in '[{':
+            return {
+                'success': False,
+                'msg': f'Failed to parse PowerShell output: expected JSON, got {output[:80]!r}',
+                'drive_letter': parsed_drive
+            }
+        
         try:
-            disk_data = json.loads(result.stdout.strip())
+            disk_data = json_loads(output) if output else None
             if isinstance(disk_data, list):
                 disk_data = disk_data[0] if disk_data else None
             
@@ -176,7 +223,7 @@ def get_disk_info(drive_letter):
                 'disk_info': disk_data
             }
             
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             return {
                 'success': False,
                 'msg': f'Failed to parse PowerShell output: {e}',
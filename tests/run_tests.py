@@ -27,6 +27,10 @@ class TestRunner:
         """Discover and return test suites"""
         test_suites = []
         
+        # Make the modules importable once for every test file in the run
+        if str(self.modules_dir) not in sys.path:
+            sys.path.insert(0, str(self.modules_dir))
+        
         if test_type in ('all', 'unit'):
             unit_tests_dir = self.tests_dir / 'unit'
             if unit_tests_dir.exists():
@@ -2,9 +2,17 @@
 """
 Enhanced unit tests for application_properties module using real-world data
 This test suite uses actual production application.properties content
+
+Tests only write inside their own per-process temp directories and the fixture
+cache is process-local, so the classes can safely run in parallel workers.
 """
 
+import functools
+import glob
+import importlib.util
+import mmap
 import os
+import re
 import sys
 import unittest
 import tempfile
@@ -12,51 +20,44 @@ import shutil
 from unittest.mock import patch, MagicMock
 from datetime import datetime
 
-# Add the module path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/modules'))
+APPLICATION_PROPERTIES_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../../plugins/modules/application_properties.py')
+)
 
-try:
-    from application_properties import backup_file, read_properties_file, write_properties_file, comment_existing_properties, add_ansible_block
-except ImportError:
-    # Import stubs for when module is not available
-    backup_file = None
-    read_properties_file = None
-    write_properties_file = None
-    comment_existing_properties = None
-    add_ansible_block = None
 
+def _load_application_properties():
+    """Load the application_properties module from its file without modifying sys.path"""
+    module = sys.modules.get('application_properties')
+    if module is not None:
+        return module
+    spec = importlib.util.spec_from_file_location('application_properties', APPLICATION_PROPERTIES_PATH)
+    module = importlib.util.module_from_spec(spec)
+    # Register before executing so patch('application_properties.<name>') resolves to it
+    sys.modules['application_properties'] = module
+    try:
+        spec.loader.exec_module(module)
+    except (ImportError, FileNotFoundError):
+        # Module not available, the tests depending on it are skipped
+        del sys.modules['application_properties']
+        return None
+    return module
 
-class TestApplicationPropertiesRealWorld(unittest.TestCase):
-    """Test cases using real-world application.properties content"""
 
-    def setUp(self):
-        """Set up test environment with real properties file"""
-        self.test_dir = tempfile.mkdtemp()
-        self.properties_file = os.path.join(self.test_dir, 'application.properties')
-        
-        # Load real properties content
-        fixtures_dir = os.path.join(os.path.dirname(__file__), '../fixtures')
-        real_props_file = os.path.join(fixtures_dir, 'real_application.properties')
-        
-        if os.path.exists(real_props_file):
-            with open(real_props_file, 'r', encoding='utf-8') as f:
-                self.real_properties_content = f.read()
-        else:
-            # Fallback content if fixture file doesn't exist
-            self.real_properties_content = self._get_sample_real_content()
-        
-        # Create test file with real content
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(self.real_properties_content)
+application_properties = _load_application_properties()
+backup_file = getattr(application_properties, 'backup_file', None)
+read_properties_file = getattr(application_properties, 'read_properties_file', None)
+write_properties_file = getattr(application_properties, 'write_properties_file', None)
+comment_existing_properties = getattr(application_properties, 'comment_existing_properties', None)
+add_ansible_block = getattr(application_properties, 'add_ansible_block', None)
+MODULE_AVAILABLE = application_properties is not None
 
-    def tearDown(self):
-        """Clean up test environment"""
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
+# Decorative section header border and Jasypt encrypted value
+SECTION_HEADER_RE = re.compile(r'#{60,}')
+ENCRYPTED_VALUE_RE = re.compile(r'ENC\([^)]+\)')
 
-    def _get_sample_real_content(self):
-        """Fallback real-world content for testing"""
-        return """# Properties file with JDBC and JPA settings
+FIXTURES = {
+    # Fallback real-world content when the fixture file is missing
+    'sample_real': """# Properties file with JDBC and JPA settings
 spring.datasource.driver-class-name = org.postgresql.Driver
 spring.datasource.password = ENC(ErHtDY2qfBjBhPAyZ0lB2fBN1vMPW0NTmD1LGAOUUx8=)
 spring.datasource.url = jdbc:postgresql://localhost:5432/cloudserver
@@ -74,9 +75,133 @@ server.servlet.session.timeout = 180m
 
 ct.cloud.hostname = preprod.experitest.com
 ct.password-management.access-key-expiration-duration = 3650d
-"""
+""",
+    # Smaller but realistic properties file for integration tests
+    'integration': """# Production Configuration
+spring.datasource.driver-class-name = org.postgresql.Driver
+spring.datasource.password = ENC(TestEncryptedPassword123=)
+spring.datasource.url = jdbc:postgresql://localhost:5432/testdb
+spring.datasource.username = ENC(TestEncryptedUser456=)
+
+#######################################################################
+#  Server Configuration
+#######################################################################
+server.port = 8080
+server.servlet.session.timeout = 180m
+management.server.address = 127.0.0.1
+management.server.port = 33300
+
+# Feature flags
+ct.cloud.feature.enabled = true
+ct.password-management.access-key-expiration-duration = 3650d
+""",
+}
+
+# Shared temp root helper lives next to the tests
+try:
+    from tmpfs_helper import fast_tmp_root
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from tmpfs_helper import fast_tmp_root
+
+REAL_PROPERTIES_FILE = os.path.join(os.path.dirname(__file__), '../fixtures', 'real_application.properties')
+
+
+@functools.lru_cache(maxsize=1)
+def _load_fixture():
+    """Read the real properties fixture once per test run, or None if it is missing"""
+    if not os.path.exists(REAL_PROPERTIES_FILE):
+        return None
+    with open(REAL_PROPERTIES_FILE, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _parse_properties(text):
+    """Parse active `key = value` lines into a dict, later keys overriding earlier ones
+
+    Only the exact written layout is recognised, so a `key=value` line does not count.
+    """
+    return {
+        key: value
+        for line in text.splitlines()
+        if not line.startswith('#')
+        for key, sep, value in [line.partition(' = ')]
+        if sep
+    }
+
+
+def _index_properties(text):
+    """Index `key = value` and `#key = value` lines as {(key, value): is_commented}"""
+    index = {}
+    for line in text.splitlines():
+        is_commented = line.startswith('#')
+        key, sep, value = (line[1:] if is_commented else line).partition(' = ')
+        if sep:
+            index[(key, value)] = is_commented
+    return index
+
+
+def _remove_test_files(properties_file):
+    """Remove a test properties file and any backups created next to it"""
+    for path in (properties_file, *glob.glob(properties_file + '.backup*')):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+@unittest.skipUnless(MODULE_AVAILABLE, "Module not available")
+class TestApplicationPropertiesRealWorld(unittest.TestCase):
+    """Test cases using real-world application.properties content"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Create a shared test directory holding a master copy of the real properties file"""
+        cls.test_dir = tempfile.mkdtemp(prefix=f'apptest_{os.getpid()}_', dir=fast_tmp_root())
+        cls._master_file = os.path.join(cls.test_dir, 'master.properties')
+        
+        # Encode the content once per class and write the master copy with a single write call
+        cls.real_properties_bytes = cls._load_real_content().encode('utf-8')
+        fd = os.open(cls._master_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, cls.real_properties_bytes)
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up the shared test directory"""
+        os.unlink(cls._master_file)
+        os.rmdir(cls.test_dir)
+
+    def setUp(self):
+        """Reset the properties file from the master copy"""
+        self.properties_file = os.path.join(self.test_dir, 'application.properties')
+        shutil.copyfile(self._master_file, self.properties_file)
+
+    def tearDown(self):
+        """Remove the files created by the test"""
+        _remove_test_files(self.properties_file)
+
+    @functools.cached_property
+    def real_properties_content(self):
+        """Real properties content, only loaded by tests that assert on it"""
+        return self._load_real_content()
+
+    @classmethod
+    def _load_real_content(cls):
+        """Real properties fixture content, or the fallback sample if the fixture is missing"""
+        content = _load_fixture()
+        if content is None:
+            # Fallback content if fixture file doesn't exist
+            content = cls._get_sample_real_content()
+        return content
+
+    @staticmethod
+    def _get_sample_real_content():
+        """Fallback real-world content for testing"""
+        return FIXTURES['sample_real']
 
-    @unittest.skipIf(read_properties_file is None, "Module not available")
     def test_read_real_properties_file(self):
         """Test reading the real properties file structure"""
         content = read_properties_file(self.properties_file)
@@ -86,17 +211,16 @@ ct.password-management.access-key-expiration-duration = 3650d
         self.assertGreater(len(content), 1000)  # Real file is substantial
         
         # Check for key sections
-        self.assertIn('#######################################################################', content)
+        self.assertIsNotNone(SECTION_HEADER_RE.search(content))
         self.assertIn('Datasource Settings', content)
         self.assertIn('Spring Boot Management', content)
         
         # Check for encrypted values
-        self.assertIn('ENC(', content)
+        self.assertIsNotNone(ENCRYPTED_VALUE_RE.search(content))
         
         # Check for complex URLs
         self.assertIn('jdbc:postgresql:', content)
 
-    @unittest.skipIf(backup_file is None, "Module not available")
     @patch('application_properties.datetime')
     def test_backup_real_properties_file(self, mock_datetime):
         """Test backup functionality with real properties file"""
@@ -109,16 +233,13 @@ ct.password-management.access-key-expiration-duration = 3650d
         self.assertTrue(os.path.exists(backup_path))
         self.assertIn('20250915_143045', backup_path)
         
-        # Verify backup content matches original
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
-        
-        self.assertEqual(backup_content, self.real_properties_content)
-        
-        # Verify backup preserves encrypted values
-        self.assertIn('ENC(ErHtDY2qfBjBhPAyZ0lB2fBN1vMPW0NTmD1LGAOUUx8=)', backup_content)
+        # Verify backup content matches original, comparing bytes straight from the page cache
+        with open(backup_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as backup_content:
+            self.assertEqual(bytes(backup_content), self.real_properties_bytes)
+            
+            # Verify backup preserves encrypted values
+            self.assertNotEqual(backup_content.find(b'ENC(ErHtDY2qfBjBhPAyZ0lB2fBN1vMPW0NTmD1LGAOUUx8=)'), -1)
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_add_properties_to_real_file(self):
         """Test adding new properties to real file while preserving structure"""
         new_properties = {
@@ -137,31 +258,15 @@ ct.password-management.access-key-expiration-duration = 3650d
             marker=marker
         )
         
-        # Verify original content is preserved
-        original_lines = self.real_properties_content.split('\n')
-        result_lines = result.split('\n')
-        
-        # Find where the Ansible block starts
-        ansible_start = None
-        for i, line in enumerate(result_lines):
-            if marker in line and 'BEGIN' in line:
-                ansible_start = i
-                break
-        
-        self.assertIsNotNone(ansible_start, "Ansible block not found")
-        
-        # Verify original content before Ansible block is intact
-        for i in range(min(ansible_start, len(original_lines))):
-            if i < len(original_lines) and i < len(result_lines):
-                if not result_lines[i].startswith('#') or 'ANSIBLE' not in result_lines[i]:
-                    # Allow for some formatting differences but preserve content
-                    pass
+        # Verify the Ansible block was added
+        block_start = re.search(rf'^(?=.*BEGIN).*{re.escape(marker)}', result, re.MULTILINE)
+        self.assertIsNotNone(block_start, "Ansible block not found")
         
         # Verify new properties are added
-        for key, value in new_properties.items():
-            self.assertIn(f'{key} = {value}', result)
+        parsed = _parse_properties(result)
+        missing = {key: value for key, value in new_properties.items() if parsed.get(key) != value}
+        self.assertEqual(missing, {}, f"Missing or wrong properties: {missing}")
 
-    @unittest.skipIf(comment_existing_properties is None, "Module not available")
     def test_comment_existing_encrypted_properties(self):
         """Test commenting out existing properties including encrypted ones"""
         properties_to_comment = {
@@ -185,7 +290,6 @@ ct.password-management.access-key-expiration-duration = 3650d
         self.assertIn('spring.datasource.driver-class-name = org.postgresql.Driver', result)
         self.assertIn('management.server.address = 127.0.0.1', result)
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_preserve_section_headers(self):
         """Test that section headers with decorative borders are preserved"""
         new_properties = {
@@ -199,12 +303,11 @@ ct.password-management.access-key-expiration-duration = 3650d
         )
         
         # Verify section headers are preserved
-        self.assertIn('#######################################################################', result)
+        self.assertIsNotNone(SECTION_HEADER_RE.search(result))
         self.assertIn('#  Datasource Settings', result)
         self.assertIn('#  Spring Boot Management', result)
         self.assertIn('#  End of Datasource Settings', result)
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_handle_complex_urls_and_paths(self):
         """Test handling properties with complex URLs and file paths"""
         complex_properties = {
@@ -221,8 +324,9 @@ ct.password-management.access-key-expiration-duration = 3650d
         )
         
         # Verify complex URLs are handled correctly
-        for key, value in complex_properties.items():
-            self.assertIn(f'{key} = {value}', result)
+        parsed = _parse_properties(result)
+        missing = {key: value for key, value in complex_properties.items() if parsed.get(key) != value}
+        self.assertEqual(missing, {}, f"Missing or wrong properties: {missing}")
         
         # Verify original complex URLs are preserved or commented
         original_kafka_url = 'b-2.ctinternaluseast1.pwylnr.c19.kafka.us-east-1.amazonaws.com:9092'
@@ -233,7 +337,6 @@ ct.password-management.access-key-expiration-duration = 3650d
             f'# {original_kafka_url}' in result
         )
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_handle_duration_formats(self):
         """Test handling properties with duration formats (h, m, d, s)"""
         duration_properties = {
@@ -250,14 +353,14 @@ ct.password-management.access-key-expiration-duration = 3650d
         )
         
         # Verify duration properties are added correctly
-        for key, value in duration_properties.items():
-            self.assertIn(f'{key} = {value}', result)
+        parsed = _parse_properties(result)
+        missing = {key: value for key, value in duration_properties.items() if parsed.get(key) != value}
+        self.assertEqual(missing, {}, f"Missing or wrong properties: {missing}")
         
         # Verify original duration properties are commented out
         self.assertIn('#server.servlet.session.timeout = 180m', result)
         self.assertIn('#ct.password-management.access-key-expiration-duration = 3650d', result)
 
-    @unittest.skipIf(write_properties_file is None, "Module not available")
     def test_write_and_read_cycle_preserves_structure(self):
         """Test that write and read cycle preserves the file structure"""
         # Read original content
@@ -274,10 +377,9 @@ ct.password-management.access-key-expiration-duration = 3650d
         
         # Verify key elements are still present
         self.assertIn('ENC(ErHtDY2qfBjBhPAyZ0lB2fBN1vMPW0NTmD1LGAOUUx8=)', final_content)
-        self.assertIn('#######################################################################', final_content)
+        self.assertIsNotNone(SECTION_HEADER_RE.search(final_content))
         self.assertIn('spring.datasource.driver-class-name = org.postgresql.Driver', final_content)
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_update_existing_encrypted_properties(self):
         """Test updating properties that contain encrypted values"""
         # Update encrypted properties with new encrypted values
@@ -293,16 +395,18 @@ ct.password-management.access-key-expiration-duration = 3650d
             marker='ANSIBLE MANAGED BLOCK'
         )
         
-        # Verify old encrypted values are commented out
-        self.assertIn('#spring.datasource.password = ENC(ErHtDY2qfBjBhPAyZ0lB2fBN1vMPW0NTmD1LGAOUUx8=)', result)
-        self.assertIn('#spring.datasource.username = ENC(/cEe75s4cf+mzcXtEV0DGDxcTbnzVWjM)', result)
+        # Old encrypted values must be commented out, new values added uncommented
+        expected_states = {
+            ('spring.datasource.password', 'ENC(ErHtDY2qfBjBhPAyZ0lB2fBN1vMPW0NTmD1LGAOUUx8=)'): True,
+            ('spring.datasource.username', 'ENC(/cEe75s4cf+mzcXtEV0DGDxcTbnzVWjM)'): True,
+        }
+        expected_states.update({(key, value): False for key, value in encrypted_updates.items()})
         
-        # Verify new encrypted values are added
-        self.assertIn('spring.datasource.password = ENC(NewEncryptedPasswordHash12345=)', result)
-        self.assertIn('spring.datasource.username = ENC(NewEncryptedUsernameHash67890=)', result)
-        self.assertIn('ct.security.pairing-key = new-pairing-key-value-for-testing', result)
+        index = _index_properties(result)
+        for (key, value), is_commented in expected_states.items():
+            with self.subTest(key=key, value=value):
+                self.assertEqual(index.get((key, value)), is_commented)
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_handle_regex_and_special_characters(self):
         """Test handling properties with regex patterns and special characters"""
         special_properties = {
@@ -319,15 +423,22 @@ ct.password-management.access-key-expiration-duration = 3650d
         )
         
         # Verify special character properties are handled correctly
-        for key, value in special_properties.items():
-            self.assertIn(f'{key} = {value}', result)
+        parsed = _parse_properties(result)
+        missing = {key: value for key, value in special_properties.items() if parsed.get(key) != value}
+        self.assertEqual(missing, {}, f"Missing or wrong properties: {missing}")
         
         # Verify original regex pattern is commented out
         self.assertIn('#cloud.metric.allow = .*', result)
 
+
+class TestRealPropertiesFixture(unittest.TestCase):
+    """Checks on the real-world fixture content that do not need the module"""
+
     def test_real_file_analysis_completeness(self):
         """Test that our analysis covers all aspects of the real file"""
-        content = self.real_properties_content
+        content = _load_fixture()
+        if content is None:
+            content = TestApplicationPropertiesRealWorld._get_sample_real_content()
         
         # Verify we have all the complex elements we identified
         test_elements = {
@@ -343,48 +454,35 @@ ct.password-management.access-key-expiration-duration = 3650d
             'regex_patterns': '.*'
         }
         
-        for element_name, pattern in test_elements.items():
-            with self.subTest(element=element_name):
-                self.assertIn(pattern, content, f"Missing {element_name} pattern: {pattern}")
+        # Scan the content once for all patterns instead of once per pattern
+        elements_regex = re.compile('|'.join(
+            f'(?P<{element_name}>{re.escape(pattern)})'
+            for element_name, pattern in test_elements.items()
+        ))
+        found_elements = {match.lastgroup for match in elements_regex.finditer(content)}
+        
+        missing = {name: test_elements[name] for name in test_elements.keys() - found_elements}
+        self.assertEqual(missing, {}, f"Missing patterns: {missing}")
 
 
+@unittest.skipUnless(MODULE_AVAILABLE, "Module not available")
 class TestApplicationPropertiesRealWorldIntegration(unittest.TestCase):
     """Integration tests using real-world scenarios"""
 
     def setUp(self):
         """Set up integration test environment"""
-        self.test_dir = tempfile.mkdtemp()
+        self.test_dir = tempfile.mkdtemp(prefix=f'apptest_{os.getpid()}_', dir=fast_tmp_root())
         self.properties_file = os.path.join(self.test_dir, 'application.properties')
         
-        # Create a smaller but realistic properties file for integration tests
-        self.integration_content = """# Production Configuration
-spring.datasource.driver-class-name = org.postgresql.Driver
-spring.datasource.password = ENC(TestEncryptedPassword123=)
-spring.datasource.url = jdbc:postgresql://localhost:5432/testdb
-spring.datasource.username = ENC(TestEncryptedUser456=)
-
-#######################################################################
-#  Server Configuration
-#######################################################################
-server.port = 8080
-server.servlet.session.timeout = 180m
-management.server.address = 127.0.0.1
-management.server.port = 33300
-
-# Feature flags
-ct.cloud.feature.enabled = true
-ct.password-management.access-key-expiration-duration = 3650d
-"""
-        
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(self.integration_content)
+        # Smaller but realistic properties content for integration tests; the
+        # workflow under test creates the file itself, so it is not pre-written
+        self.integration_content = FIXTURES['integration']
 
     def tearDown(self):
         """Clean up integration test environment"""
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
+        _remove_test_files(self.properties_file)
+        os.rmdir(self.test_dir)
 
-    @unittest.skipIf(add_ansible_block is None, "Module not available")
     def test_full_workflow_realistic_scenario(self):
         """Test complete workflow with realistic property updates"""
         # Simulate updating database configuration and adding new features
@@ -425,7 +523,7 @@ ct.password-management.access-key-expiration-duration = 3650d
         self.assertIn('# END ANSIBLE MANAGED BLOCK', updated_content)
         
         # Verify original structure is preserved
-        self.assertIn('#######################################################################', updated_content)
+        self.assertIsNotNone(SECTION_HEADER_RE.search(updated_content))
         self.assertIn('#  Server Configuration', updated_content)
 
 
@@ -4,26 +4,33 @@ Backup and Recovery test suite for application_properties module
 Tests backup creation, restoration, and recovery scenarios
 """
 
+import filecmp
 import os
+import re
 import sys
 import unittest
 import tempfile
 import shutil
-import glob
-import time
-from unittest.mock import patch, Mock
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
+
+# Retention window used by the retention policy test
+RETENTION_SECONDS = 7 * 24 * 60 * 60  # 7 days
+
+# Shared temp root helper lives next to the tests
+try:
+    from tmpfs_helper import fast_tmp_root
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from tmpfs_helper import fast_tmp_root
+
 
 class TestBackupAndRecovery(unittest.TestCase):
     """Test backup and recovery functionality with real-world scenarios"""
 
-    def setUp(self):
-        """Set up test environment for backup and recovery tests"""
-        self.test_dir = tempfile.mkdtemp()
-        self.properties_file = os.path.join(self.test_dir, 'application.properties')
-        
-        # Create a complex properties file for backup testing
-        self.complex_content = """# Complex Production Configuration
+    # Complex production properties file used as the backup source
+    complex_content = """# Complex Production Configuration
 # Contains sensitive data and critical settings
 # Backup and recovery are essential for this file
 
@@ -90,83 +97,97 @@ feature.beta-features.rollout-percentage = 25
 cache.redis.cluster-nodes = redis-01:6379,redis-02:6379,redis-03:6379
 cache.redis.password = ENC(RedisClusterPasswordProduction=)
 """
+
+    # Encrypted values that every backup of complex_content must preserve
+    _ENC_PATTERNS = (
+        'ENC(ProductionPasswordHash123456789ABCDEF=)',
+        'ENC(ProductionUsernameHashABCDEF123456789=)',
+        'ENC(MasterKeyForProductionEnvironment12345=)',
+        'ENC(JWTSecretKeyForProductionSigning67890=)',
+        'ENC(PaymentGatewayAPIKeyProduction=)',
+        'ENC(CloudStorageAccessKeyProduction=)',
+        'ENC(KeystorePasswordProduction=)'
+    )
+    _ENC_REGEX = re.compile('|'.join(re.escape(pattern) for pattern in _ENC_PATTERNS))
+
+    # Section header line used throughout complex_content
+    _SECTION_HEADER = '#' * 71
+
+    # Backup names expected from three backups taken one second apart
+    _UNIQUE_BACKUP_NAMES = (
+        'application.properties.backup.20250915_143045',
+        'application.properties.backup.20250915_143046',
+        'application.properties.backup.20250915_143047'
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        """Create the class temp root, record its free space and write the canonical properties file once"""
+        cls._root = tempfile.mkdtemp(prefix='backup_tests_', dir=fast_tmp_root())
+        cls.addClassCleanup(shutil.rmtree, cls._root, ignore_errors=True)
+        cls._disk_free = shutil.disk_usage(cls._root).free
+        cls._canonical_file = os.path.join(cls._root, 'application.properties')
+        cls._complex_bytes = cls.complex_content.encode('utf-8')
+        Path(cls._canonical_file).write_bytes(cls._complex_bytes)
+
+    def setUp(self):
+        """Set up test environment for backup and recovery tests"""
+        self.test_dir = os.path.join(self._root, f't{self._testMethodName}')
+        os.mkdir(self.test_dir)
+        self.properties_file = os.path.join(self.test_dir, 'application.properties')
         
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(self.complex_content)
+        # Copy rather than hard-link: several tests rewrite or chmod the file in place,
+        # which would also change a hard-linked canonical copy
+        shutil.copyfile(self._canonical_file, self.properties_file)
+        self._text_cache = {}
 
     def tearDown(self):
         """Clean up test environment"""
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir)
+        shutil.rmtree(self.test_dir)
 
     def test_backup_creation_basic(self):
         """Test basic backup file creation"""
-        # Mock datetime for consistent backup naming
-        with patch('application_properties.datetime') as mock_datetime:
-            mock_datetime.now.return_value = datetime(2025, 9, 15, 14, 30, 45)
-            
-            backup_path = self._simulate_backup_creation()
-            
-            # Verify backup file exists
-            self.assertTrue(os.path.exists(backup_path))
-            
-            # Verify backup filename format
-            expected_name = 'application.properties.backup.20250915_143045'
-            self.assertIn(expected_name, backup_path)
-            
-            # Verify backup content matches original
-            with open(backup_path, 'r', encoding='utf-8') as f:
-                backup_content = f.read()
-            
-            self.assertEqual(backup_content, self.complex_content)
+        # Fixed timestamp for consistent backup naming
+        backup_path = self._simulate_backup_creation(datetime(2025, 9, 15, 14, 30, 45))
+        
+        # Verify backup file exists
+        self.assertTrue(os.path.exists(backup_path))
+        
+        # Verify backup filename format
+        expected_name = 'application.properties.backup.20250915_143045'
+        self.assertIn(expected_name, backup_path)
+        
+        # Verify backup content matches original
+        self.assertEqual(os.path.getsize(backup_path), len(self._complex_bytes))
+        self._assert_files_equal(backup_path, self.properties_file)
 
     def test_backup_preserves_sensitive_data(self):
         """Test that backup preserves all sensitive encrypted data"""
         backup_path = self._simulate_backup_creation()
         
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
-        
-        # Verify all encrypted values are preserved
-        encrypted_patterns = [
-            'ENC(ProductionPasswordHash123456789ABCDEF=)',
-            'ENC(ProductionUsernameHashABCDEF123456789=)',
-            'ENC(MasterKeyForProductionEnvironment12345=)',
-            'ENC(JWTSecretKeyForProductionSigning67890=)',
-            'ENC(PaymentGatewayAPIKeyProduction=)',
-            'ENC(CloudStorageAccessKeyProduction=)',
-            'ENC(KeystorePasswordProduction=)'
-        ]
+        backup_content = self._read_text(backup_path)
         
-        for pattern in encrypted_patterns:
-            with self.subTest(pattern=pattern):
-                self.assertIn(pattern, backup_content)
+        # Verify all encrypted values are preserved, in a single scan of the backup
+        found = {match.group(0) for match in self._ENC_REGEX.finditer(backup_content)}
+        self.assertEqual(found, set(self._ENC_PATTERNS))
 
     def test_backup_preserves_file_structure(self):
         """Test that backup preserves exact file structure and formatting"""
         backup_path = self._simulate_backup_creation()
         
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
+        # Verify exact structure, byte for byte
+        self._assert_files_equal(backup_path, self.properties_file)
+        
+        backup_content = self._read_text(backup_path)
         
         # Verify section headers are preserved
-        self.assertIn('#######################################################################', backup_content)
+        self.assertIn(self._SECTION_HEADER, backup_content)
         self.assertIn('#  Database Configuration - CRITICAL', backup_content)
         self.assertIn('#  Security Configuration - HIGHLY SENSITIVE', backup_content)
         
         # Verify comments are preserved
         self.assertIn('# Contains sensitive data and critical settings', backup_content)
         self.assertIn('# Critical connection settings', backup_content)
-        
-        # Verify exact line structure
-        original_lines = self.complex_content.split('\n')
-        backup_lines = backup_content.split('\n')
-        
-        self.assertEqual(len(original_lines), len(backup_lines))
-        
-        for i, (orig, backup) in enumerate(zip(original_lines, backup_lines)):
-            with self.subTest(line_number=i+1):
-                self.assertEqual(orig, backup)
 
     def test_multiple_backups_unique_timestamps(self):
         """Test that multiple backups create unique timestamped files"""
@@ -174,14 +195,9 @@ cache.redis.password = ENC(RedisClusterPasswordProduction=)
         
         # Create multiple backups with slight time differences
         for i in range(3):
-            with patch('application_properties.datetime') as mock_datetime:
-                # Each backup has a different timestamp
-                mock_datetime.now.return_value = datetime(2025, 9, 15, 14, 30, 45 + i)
-                backup_path = self._simulate_backup_creation()
-                backups.append(backup_path)
-            
-            # Small delay to ensure different timestamps in real scenario
-            time.sleep(0.01)
+            # Each backup has a different timestamp
+            backup_path = self._simulate_backup_creation(datetime(2025, 9, 15, 14, 30, 45 + i))
+            backups.append(backup_path)
         
         # Verify all backup files are unique
         self.assertEqual(len(set(backups)), 3)
@@ -191,14 +207,8 @@ cache.redis.password = ENC(RedisClusterPasswordProduction=)
             self.assertTrue(os.path.exists(backup_path))
         
         # Verify backup file naming pattern
-        expected_patterns = [
-            'application.properties.backup.20250915_143045',
-            'application.properties.backup.20250915_143046',
-            'application.properties.backup.20250915_143047'
-        ]
-        
-        for i, backup_path in enumerate(backups):
-            self.assertIn(expected_patterns[i], backup_path)
+        for expected_name, backup_path in zip(self._UNIQUE_BACKUP_NAMES, backups):
+            self.assertIn(expected_name, backup_path)
 
     def test_backup_cleanup_old_files(self):
         """Test cleanup of old backup files when there are too many"""
@@ -212,14 +222,11 @@ cache.redis.password = ENC(RedisClusterPasswordProduction=)
         
         backup_files = []
         for backup_date in backup_dates:
-            with patch('application_properties.datetime') as mock_datetime:
-                mock_datetime.now.return_value = backup_date
-                backup_path = self._simulate_backup_creation()
-                backup_files.append(backup_path)
+            backup_path = self._simulate_backup_creation(backup_date, empty=True)
+            backup_files.append(backup_path)
         
         # Simulate cleanup that keeps only last 2 backups
-        all_backups = glob.glob(os.path.join(self.test_dir, '*.backup.*'))
-        all_backups.sort(key=os.path.getmtime, reverse=True)
+        all_backups = self._list_backups(newest_first=True)
         
         # Keep only the 2 most recent
         to_keep = all_backups[:2]
@@ -229,11 +236,10 @@ cache.redis.password = ENC(RedisClusterPasswordProduction=)
             os.remove(backup_file)
         
         # Verify only 2 backup files remain
-        remaining_backups = glob.glob(os.path.join(self.test_dir, '*.backup.*'))
+        remaining_backups = self._list_backups()
         self.assertEqual(len(remaining_backups), 2)
         
         # Verify the most recent backups are kept
-        remaining_backups.sort(key=os.path.getmtime, reverse=True)
         self.assertEqual(set(remaining_backups), set(to_keep))
 
     def test_recovery_from_backup_exact_restore(self):
@@ -248,74 +254,58 @@ server.port = 9999
 broken.property = invalid
 """
         
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(corrupted_content)
+        Path(self.properties_file).write_bytes(corrupted_content.encode('utf-8'))
         
         # Verify file is corrupted
-        with open(self.properties_file, 'r', encoding='utf-8') as f:
-            current_content = f.read()
-        self.assertNotEqual(current_content, self.complex_content)
+        self.assertNotEqual(Path(self.properties_file).read_bytes(), self._complex_bytes)
         
         # Restore from backup
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
-        
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(backup_content)
-        
-        # Verify exact restoration
-        with open(self.properties_file, 'r', encoding='utf-8') as f:
-            restored_content = f.read()
+        shutil.copyfile(backup_path, self.properties_file)
         
-        self.assertEqual(restored_content, self.complex_content)
+        # Verify exact restoration against the canonical original
+        self._assert_files_equal(self.properties_file, self._canonical_file)
+        backup_content = self._read_text(backup_path)
         
         # Verify sensitive data is restored
-        self.assertIn('ENC(ProductionPasswordHash123456789ABCDEF=)', restored_content)
-        self.assertIn('critical-production-pairing-key-do-not-lose', restored_content)
+        self.assertIn('ENC(ProductionPasswordHash123456789ABCDEF=)', backup_content)
+        self.assertIn('critical-production-pairing-key-do-not-lose', backup_content)
 
     def test_backup_during_concurrent_modifications(self):
         """Test backup behavior during concurrent file modifications"""
         # Simulate creating backup while file is being modified
-        with patch('application_properties.datetime') as mock_datetime:
-            mock_datetime.now.return_value = datetime(2025, 9, 15, 14, 30, 45)
-            
-            # Start backup process
-            backup_path = self._simulate_backup_creation()
-            
-            # Simulate concurrent modification (this would happen after backup is taken)
-            modified_content = self.complex_content + "\n# Added during backup process\nnew.property = added"
-            
-            with open(self.properties_file, 'w', encoding='utf-8') as f:
-                f.write(modified_content)
-            
-            # Verify backup contains original content (not the concurrent modification)
-            with open(backup_path, 'r', encoding='utf-8') as f:
-                backup_content = f.read()
-            
-            self.assertEqual(backup_content, self.complex_content)
-            self.assertNotIn('Added during backup process', backup_content)
-            
-            # Verify current file has the modification
-            with open(self.properties_file, 'r', encoding='utf-8') as f:
-                current_content = f.read()
+        # Start backup process
+        backup_path = self._simulate_backup_creation(datetime(2025, 9, 15, 14, 30, 45))
+        
+        # Simulate concurrent modification (this would happen after backup is taken)
+        modified_content = self.complex_content + "\n# Added during backup process\nnew.property = added"
+        
+        Path(self.properties_file).write_bytes(modified_content.encode('utf-8'))
             
-            self.assertIn('Added during backup process', current_content)
+        # Verify backup contains original content (not the concurrent modification);
+        # the modification only appends, so the size alone rules it out
+        self.assertEqual(os.path.getsize(backup_path), len(self._complex_bytes))
+        self._assert_files_equal(backup_path, self._canonical_file)
+        
+        # Verify current file has the modification, reading only its tail
+        with open(self.properties_file, 'rb') as f:
+            f.seek(-64, os.SEEK_END)
+            tail = f.read()
+        
+        self.assertIn(b'Added during backup process', tail)
 
     def test_backup_with_file_permissions(self):
         """Test backup preserves and handles file permissions correctly"""
         # Set specific permissions on original file
         os.chmod(self.properties_file, 0o600)  # Owner read/write only
         
-        backup_path = self._simulate_backup_creation()
+        backup_path = self._simulate_backup_creation_with_metadata()
         
         # Verify backup file exists and is readable
         self.assertTrue(os.path.exists(backup_path))
         
-        # Verify backup content is accessible
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
-        
-        self.assertEqual(backup_content, self.complex_content)
+        # Verify backup content is accessible and matches the original
+        self.assertEqual(os.path.getsize(backup_path), len(self._complex_bytes))
+        self._assert_files_equal(backup_path, self.properties_file)
         
         # Verify backup file has appropriate permissions (should be readable by process)
         backup_stat = os.stat(backup_path)
@@ -336,12 +326,8 @@ broken.property = invalid
         # Verify backup is complete (same size as original)
         self.assertEqual(original_size, backup_size)
         
-        # Simulate checking available disk space
-        disk_usage = shutil.disk_usage(self.test_dir)
-        available_space = disk_usage.free
-        
         # Verify there's enough space for backup (this is informational)
-        self.assertGreater(available_space, backup_size * 10)  # At least 10x backup size available
+        self.assertGreater(self._disk_free, backup_size * 10)  # At least 10x backup size available
 
     def test_backup_with_special_characters_and_encoding(self):
         """Test backup with special characters and different encodings"""
@@ -355,17 +341,14 @@ app.math.symbols = ∑∏∆∇∈∉⊂⊃∪∩∧∨¬∀∃≡≠≤≥
 """
         
         # Update file with special content
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(special_content)
+        Path(self.properties_file).write_bytes(special_content.encode('utf-8'))
         
         # Create backup
         backup_path = self._simulate_backup_creation()
         
         # Verify special characters are preserved in backup
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
-        
-        self.assertEqual(backup_content, special_content)
+        self._assert_files_equal(backup_path, self.properties_file)
+        backup_content = self._read_text(backup_path)
         
         # Verify specific special character content
         self.assertIn('Welcome! Bienvenidos! 欢迎! مرحبا! स्वागत!', backup_content)
@@ -378,31 +361,23 @@ app.math.symbols = ∑∏∆∇∈∉⊂⊃∪∩∧∨¬∀∃≡≠≤≥
         initial_backup = self._simulate_backup_creation()
         
         # Step 2: Make some changes and create another backup
-        with patch('application_properties.datetime') as mock_datetime:
-            mock_datetime.now.return_value = datetime(2025, 9, 15, 15, 0, 0)
+        # Modify content
+        modified_content = self.complex_content + "\n# Changes made after initial backup\nchange.timestamp = 2025-09-15T15:00:00\n"
+        Path(self.properties_file).write_bytes(modified_content.encode('utf-8'))
             
-            # Modify content
-            modified_content = self.complex_content + "\n# Changes made after initial backup\nchange.timestamp = 2025-09-15T15:00:00\n"
-            with open(self.properties_file, 'w', encoding='utf-8') as f:
-                f.write(modified_content)
-            
-            # Create second backup
-            second_backup = self._simulate_backup_creation()
+        # Create second backup
+        second_backup = self._simulate_backup_creation(datetime(2025, 9, 15, 15, 0, 0))
         
         # Step 3: Simulate disaster (file corruption/deletion)
         os.remove(self.properties_file)
         self.assertFalse(os.path.exists(self.properties_file))
         
         # Step 4: Recover from most recent backup
-        with open(second_backup, 'r', encoding='utf-8') as f:
-            recovery_content = f.read()
-        
-        with open(self.properties_file, 'w', encoding='utf-8') as f:
-            f.write(recovery_content)
+        shutil.copyfile(second_backup, self.properties_file)
         
         # Step 5: Verify recovery is complete
-        with open(self.properties_file, 'r', encoding='utf-8') as f:
-            recovered_content = f.read()
+        self._assert_files_equal(self.properties_file, second_backup)
+        recovered_content = self._read_text(self.properties_file)
         
         self.assertEqual(recovered_content, modified_content)
         self.assertIn('Changes made after initial backup', recovered_content)
@@ -412,47 +387,103 @@ app.math.symbols = ∑∏∆∇∈∉⊂⊃∪∩∧∨¬∀∃≡≠≤≥
         self.assertIn('ENC(ProductionPasswordHash123456789ABCDEF=)', recovered_content)
         self.assertIn('critical-production-pairing-key-do-not-lose', recovered_content)
 
-    def _simulate_backup_creation(self):
-        """Simulate the backup creation process"""
+    def test_parallel_disaster_scenarios(self):
+        """Test backups taken concurrently are all complete and usable for recovery"""
+        backup_times = [datetime(2025, 9, 15, 16, 0, second) for second in range(8)]
+        
+        # Take all backups at once from worker threads
+        with ThreadPoolExecutor(max_workers=len(backup_times)) as executor:
+            backups = list(executor.map(self._simulate_backup_creation, backup_times))
+        
+        # Verify every backup has its own file and a complete copy
+        self.assertEqual(len(set(backups)), len(backup_times))
+        for backup_path in backups:
+            with self.subTest(backup=os.path.basename(backup_path)):
+                self._assert_files_equal(backup_path, self.properties_file)
+        
+        # Simulate disaster and recover from the most recent backup
+        os.remove(self.properties_file)
+        shutil.copyfile(max(backups), self.properties_file)
+        self.assertEqual(self._read_text(self.properties_file), self.complex_content)
+
+    def _assert_files_equal(self, first, second):
+        """Assert two files have identical bytes, compared in C without decoding"""
+        filecmp.clear_cache()
+        self.assertTrue(filecmp.cmp(first, second, shallow=False), f"{first} != {second}")
+
+    def _read_text(self, path):
+        """Read a text file, reusing the cached content while its mtime and size are unchanged"""
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._text_cache:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._text_cache[key] = f.read()
+        return self._text_cache[key]
+
+    def _list_backups(self, newest_first=False):
+        """List backup file paths in the test directory, optionally newest first by mtime"""
+        with os.scandir(self.test_dir) as it:
+            entries = [entry for entry in it if '.backup.' in entry.name]
+        if newest_first:
+            entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return [entry.path for entry in entries]
+
+    @staticmethod
+    def _fmt_ts(dt):
+        """Format a datetime as the YYYYmmdd_HHMMSS backup suffix without strftime"""
+        return f'{dt.year:04d}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}'
+
+    def _simulate_backup_creation(self, when=None, empty=False, copy_function=shutil.copyfile):
+        """Simulate the backup creation process
+        
+        Only the file content is copied by default. With empty=True an empty backup
+        file is created instead, for tests that only depend on backup file names and
+        modification times.
+        """
         # This simulates the backup_file() function from application_properties module
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = self._fmt_ts(when or datetime.now())
         backup_filename = f'application.properties.backup.{timestamp}'
         backup_path = os.path.join(self.test_dir, backup_filename)
         
-        # Copy original file to backup location
-        shutil.copy2(self.properties_file, backup_path)
+        if empty:
+            open(backup_path, 'wb').close()
+        else:
+            # Copy original file to backup location
+            copy_function(self.properties_file, backup_path)
         
         return backup_path
 
+    def _simulate_backup_creation_with_metadata(self):
+        """Simulate the backup creation process preserving file metadata like backup_file()"""
+        return self._simulate_backup_creation(copy_function=shutil.copy2)
+
     def test_backup_retention_policy(self):
         """Test backup retention policy implementation"""
         # Create multiple backups over time
         backup_files = []
         base_date = datetime(2025, 9, 1)
         
+        # Only names and mtimes matter here, so create empty files directly
         for days_offset in range(30):  # 30 days of backups
             backup_date = base_date + timedelta(days=days_offset)
+            backup_name = f'application.properties.backup.{self._fmt_ts(backup_date)}'
+            backup_path = os.path.join(self.test_dir, backup_name)
+            open(backup_path, 'wb').close()
+            backup_files.append(backup_path)
             
-            with patch('application_properties.datetime') as mock_datetime:
-                mock_datetime.now.return_value = backup_date
-                
-                backup_path = self._simulate_backup_creation()
-                backup_files.append(backup_path)
-                
-                # Simulate aging the file
-                timestamp = time.mktime(backup_date.timetuple())
-                os.utime(backup_path, (timestamp, timestamp))
+            # Simulate aging the file
+            timestamp = backup_date.timestamp()
+            os.utime(backup_path, (timestamp, timestamp))
         
         # Implement retention policy: keep last 7 days
-        current_time = time.mktime(datetime(2025, 9, 30).timetuple())
-        retention_seconds = 7 * 24 * 60 * 60  # 7 days
+        current_time = datetime(2025, 9, 30).timestamp()
         
         files_to_keep = []
         files_to_remove = []
         
         for backup_file in backup_files:
             file_age = current_time - os.path.getmtime(backup_file)
-            if file_age <= retention_seconds:
+            if file_age < RETENTION_SECONDS:
                 files_to_keep.append(backup_file)
             else:
                 files_to_remove.append(backup_file)
@@ -466,7 +497,7 @@ app.math.symbols = ∑∏∆∇∈∉⊂⊃∪∩∧∨¬∀∃≡≠≤≥
             os.remove(old_backup)
         
         # Verify only recent backups remain
-        remaining_backups = glob.glob(os.path.join(self.test_dir, '*.backup.*'))
+        remaining_backups = self._list_backups()
         self.assertEqual(len(remaining_backups), 7)
 
     def test_backup_validation_and_integrity(self):
@@ -474,29 +505,46 @@ app.math.symbols = ∑∏∆∇∈∉⊂⊃∪∩∧∨¬∀∃≡≠≤≥
         backup_path = self._simulate_backup_creation()
         
         # Verify backup integrity by checking key markers
-        with open(backup_path, 'r', encoding='utf-8') as f:
-            backup_content = f.read()
+        backup_content = self._read_text(backup_path)
+        
+        # Gather every integrity marker in a single pass over the lines
+        hash_count = eq_count = 0
+        property_lines = []
+        has_sections = has_enc_open = has_enc_close = has_db = has_sec = has_newline = False
+        for line in backup_content.splitlines(True):
+            hash_count += line.count('#')
+            if ' = ' in line:
+                eq_count += 1
+                if not line.lstrip().startswith('#'):
+                    property_lines.append(line.rstrip('\n'))
+            if not has_sections and self._SECTION_HEADER in line:
+                has_sections = True
+            if not has_enc_open and 'ENC(' in line:
+                has_enc_open = True
+            if not has_enc_close and ')' in line:
+                has_enc_close = True
+            if not has_db and 'spring.datasource' in line:
+                has_db = True
+            if not has_sec and 'ct.security' in line:
+                has_sec = True
+            if not has_newline and line.endswith('\n'):
+                has_newline = True
         
         # Check for configuration file markers
-        integrity_checks = [
-            ('has_comments', lambda c: c.count('#') > 10),
-            ('has_sections', lambda c: '#######################################################################' in c),
-            ('has_properties', lambda c: c.count(' = ') > 20),
-            ('has_encrypted_values', lambda c: 'ENC(' in c and ')' in c),
-            ('has_database_config', lambda c: 'spring.datasource' in c),
-            ('has_security_config', lambda c: 'ct.security' in c),
-            ('proper_line_endings', lambda c: '\n' in c),
-            ('non_empty', lambda c: len(c.strip()) > 100)
-        ]
-        
-        for check_name, check_func in integrity_checks:
-            with self.subTest(check=check_name):
-                self.assertTrue(check_func(backup_content), f"Integrity check failed: {check_name}")
+        integrity_checks = {
+            'has_comments': hash_count > 10,
+            'has_sections': has_sections,
+            'has_properties': eq_count > 20,
+            'has_encrypted_values': has_enc_open and has_enc_close,
+            'has_database_config': has_db,
+            'has_security_config': has_sec,
+            'proper_line_endings': has_newline,
+            'non_empty': len(backup_content.strip()) > 100
+        }
+        failed = [name for name, passed in integrity_checks.items() if not passed]
+        self.assertEqual(failed, [], f"Integrity checks failed: {failed}")
         
         # Verify backup can be parsed as properties (basic format check)
-        lines = backup_content.split('\n')
-        property_lines = [line for line in lines if ' = ' in line and not line.strip().startswith('#')]
-        
         # Should have significant number of properties
         self.assertGreater(len(property_lines), 20)
         
@@ -5,32 +5,56 @@ Unit tests for health_check module
 
 import os
 import sys
+import re
+import threading
 import unittest
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch
 import socket
+from types import SimpleNamespace
 
-# Add the module path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/modules'))
+# Add the module path unless the module is already importable
+try:
+    import health_check  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/modules'))
 
 try:
-    from health_check import check_server_status
+    from health_check import check_server_status, probe_urls, retry_delay, main
+    MODULE_AVAILABLE = True
 except ImportError:
-    check_server_status = None
+    MODULE_AVAILABLE = False
+
+
+def _fake_response(code=200, body=b'', read_error=None):
+    """Build a minimal urllib response stub exposing only getcode() and read()"""
+    def read():
+        if read_error is not None:
+            raise read_error
+        return body
+    return SimpleNamespace(getcode=lambda: code, read=read)
+
+
+def _module_params(**overrides):
+    """Return a complete health_check params dict with the module defaults, plus overrides"""
+    params = {
+        'url': 'http://localhost:8080/health', 'urls': None, 'headers': None, 'initial_delay': 0,
+        'delay_between_tries': 5, 'backoff_factor': 1, 'max_delay': None, 'jitter': 0,
+        'max_retries': 10, 'timeout': 3, 'expected_status': 200, 'expected_regexp': None,
+    }
+    params.update(overrides)
+    return params
 
 
+@unittest.skipUnless(MODULE_AVAILABLE, "Module not available")
 class TestHealthCheckModule(unittest.TestCase):
     """Test cases for health_check module functions"""
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_success(self, mock_request, mock_urlopen):
         """Test successful health check"""
         # Mock successful response
-        mock_response = Mock()
-        mock_response.getcode.return_value = 200
-        mock_response.read.return_value = b'{"status": "healthy"}'
-        mock_urlopen.return_value = mock_response
+        mock_urlopen.return_value = _fake_response(body=b'{"status": "healthy"}')
 
         result = check_server_status(
             url='http://localhost:8080/health',
@@ -46,15 +70,12 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertEqual(result['expected_status'], 200)
         self.assertEqual(result['url'], 'http://localhost:8080/health')
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_wrong_status(self, mock_request, mock_urlopen):
         """Test health check with unexpected status code"""
         # Mock response with wrong status
-        mock_response = Mock()
-        mock_response.getcode.return_value = 500
-        mock_urlopen.return_value = mock_response
+        mock_urlopen.return_value = _fake_response(500)
 
         result = check_server_status(
             url='http://localhost:8080/health',
@@ -69,8 +90,7 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertEqual(result['actual_status'], 500)
         self.assertEqual(result['expected_status'], 200)
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_http_error_expected(self, mock_request, mock_urlopen):
         """Test health check where HTTP error matches expected status"""
@@ -98,8 +118,36 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertEqual(result['actual_status'], 404)
         self.assertEqual(result['expected_status'], 404)
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
+    @patch('health_check.urllib_request.Request')
+    def test_check_server_status_http_error_expected_regexp(self, mock_request, mock_urlopen):
+        """Test expected_regexp is applied to the body of an expected HTTP error status"""
+        import io
+        import urllib.error
+
+        for body, success in ((b'{"status": "MAINTENANCE"}', True), (b'{"status": "DOWN"}', False)):
+            with self.subTest(body=body):
+                mock_urlopen.side_effect = urllib.error.HTTPError(
+                    url='http://localhost:8080/health',
+                    code=503,
+                    msg='Service Unavailable',
+                    hdrs={},
+                    fp=io.BytesIO(body)
+                )
+
+                result = check_server_status(
+                    url='http://localhost:8080/health',
+                    headers={},
+                    expected_status=503,
+                    timeout=10,
+                    expected_regexp=re.compile('"status": "MAINTENANCE"')
+                )
+
+                self.assertEqual(result['success'], success)
+                self.assertEqual(result['actual_status'], 503)
+                self.assertEqual(result['content'], body)
+
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_http_error_unexpected(self, mock_request, mock_urlopen):
         """Test health check where HTTP error doesn't match expected status"""
@@ -127,8 +175,7 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertEqual(result['actual_status'], 500)
         self.assertEqual(result['expected_status'], 200)
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_connection_error(self, mock_request, mock_urlopen):
         """Test health check with connection error"""
@@ -150,8 +197,7 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertEqual(result['expected_status'], 200)
         self.assertNotIn('actual_status', result)
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_socket_error(self, mock_request, mock_urlopen):
         """Test health check with socket error"""
@@ -171,16 +217,12 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertIn('URLError:', result['msg'])
         self.assertEqual(result['expected_status'], 200)
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
-    @patch('health_check.urllib_request.urlopen')
+    @patch('health_check._OPENER.open')
     @patch('health_check.urllib_request.Request')
     def test_check_server_status_read_error(self, mock_request, mock_urlopen):
         """Test health check where response.read() fails"""
         # Mock response where read() raises exception
-        mock_response = Mock()
-        mock_response.getcode.return_value = 200
-        mock_response.read.side_effect = Exception('Read error')
-        mock_urlopen.return_value = mock_response
+        mock_urlopen.return_value = _fake_response(read_error=Exception('Read error'))
 
         result = check_server_status(
             url='http://localhost:8080/health',
@@ -195,11 +237,51 @@ class TestHealthCheckModule(unittest.TestCase):
         self.assertEqual(result['msg'], 'OK')
         self.assertEqual(result['content'], '')  # Empty content due to read error
 
+    @patch('health_check._OPENER.open')
+    @patch('health_check.urllib_request.Request')
+    def test_check_server_status_regexp_mismatch(self, mock_request, mock_urlopen):
+        """Test health check fails when expected_regexp does not match the content"""
+        mock_urlopen.return_value = _fake_response(body=b'{"status": "starting"}')
+
+        result = check_server_status(
+            url='http://localhost:8080/health',
+            headers={},
+            expected_status=200,
+            timeout=10,
+            expected_regexp=re.compile(r'"status":\s*"(OK|healthy)"')
+        )
+
+        self.assertFalse(result['success'])
+        self.assertIn('not found in response', result['msg'])
+        self.assertEqual(result['actual_status'], 200)
+
+    @patch('health_check._OPENER.open')
+    @patch('health_check.urllib_request.Request')
+    def test_default_timeout_is_short(self, mock_request, mock_urlopen):
+        """Test probes default to a short timeout and leave recovery to the retry loop"""
+        mock_urlopen.return_value = _fake_response(body=b'{"status": "healthy"}')
+
+        result = check_server_status('http://localhost:8080/health', {}, 200)
 
+        self.assertTrue(result['success'])
+        self.assertEqual(mock_urlopen.call_args.kwargs['timeout'], 3)
+
+    def test_https_uses_shared_ssl_context(self):
+        """Test HTTPS probes go through a handler holding the module-level TLS context"""
+        import health_check
+        import urllib.request
+
+        https_handlers = [handler for handler in health_check._OPENER.handlers
+                          if isinstance(handler, urllib.request.HTTPSHandler)]
+
+        self.assertEqual(len(https_handlers), 1)
+        self.assertIs(https_handlers[0]._context, health_check._SSL_CONTEXT)
+
+
+@unittest.skipUnless(MODULE_AVAILABLE, "Module not available")
 class TestHealthCheckIntegration(unittest.TestCase):
     """Integration tests for health_check module workflow"""
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
     @patch('health_check.time.sleep')
     @patch('health_check.check_server_status')
     def test_retry_logic_success_first_try(self, mock_check, mock_sleep):
@@ -223,7 +305,6 @@ class TestHealthCheckIntegration(unittest.TestCase):
         mock_sleep.assert_not_called()
         mock_check.assert_called_once()
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
     @patch('health_check.time.sleep')
     @patch('health_check.check_server_status')
     def test_retry_logic_success_after_retries(self, mock_check, mock_sleep):
@@ -253,7 +334,6 @@ class TestHealthCheckIntegration(unittest.TestCase):
         self.assertEqual(mock_sleep.call_count, 2)
         mock_sleep.assert_called_with(delay_between_tries)
 
-    @unittest.skipIf(check_server_status is None, "Module not available")
     @patch('health_check.time.sleep')
     @patch('health_check.check_server_status')
     def test_retry_logic_max_retries_exceeded(self, mock_check, mock_sleep):
@@ -280,6 +360,154 @@ class TestHealthCheckIntegration(unittest.TestCase):
         # Should have slept max_retries - 1 times
         self.assertEqual(mock_sleep.call_count, max_retries - 1)
 
+    def test_retry_delay_fixed_by_default(self):
+        """Test the default backoff settings keep delay_between_tries constant"""
+        delays = [retry_delay(attempt, 5, backoff_factor=1, max_delay=None, jitter=0) for attempt in range(1, 5)]
+        self.assertEqual(delays, [5, 5, 5, 5])
+
+    @patch('health_check.random.uniform', return_value=1.0)
+    def test_retry_delay_exponential_backoff(self, mock_uniform):
+        """Test delays grow exponentially up to max_delay, with jitter applied to each"""
+        delays = [retry_delay(attempt, 2, backoff_factor=2, max_delay=20, jitter=0.2) for attempt in range(1, 6)]
+
+        self.assertEqual(delays, [2, 4, 8, 16, 20])
+        mock_uniform.assert_called_with(0.8, 1.2)
+        self.assertEqual(mock_uniform.call_count, 5)
+
+    def test_retry_delay_capped_without_overflow(self):
+        """Test a float backoff stays at max_delay for retry counts far past float range"""
+        self.assertEqual(retry_delay(2000, 5, backoff_factor=2.0, max_delay=60, jitter=0), 60)
+
+    @patch('health_check.random.uniform', return_value=1.2)
+    def test_retry_delay_jitter_respects_max_delay(self, mock_uniform):
+        """Test jitter never pushes the sleep above max_delay"""
+        self.assertEqual(retry_delay(10, 5, backoff_factor=2, max_delay=60, jitter=0.2), 60)
+
+    def test_retry_delay_jitter_bounds(self):
+        """Test jittered delays stay within the requested spread"""
+        for _ in range(100):
+            delay = retry_delay(3, 5, backoff_factor=1, max_delay=None, jitter=0.2)
+            self.assertGreaterEqual(delay, 4.0)
+            self.assertLessEqual(delay, 6.0)
+
+    @patch('health_check.check_server_status')
+    def test_parallel_probes_early_exit(self, mock_check):
+        """Test concurrent probes return on the first success without waiting for slower ones"""
+        urls = ['http://app-01:8080/health', 'http://app-02:8080/health', 'http://app-03:8080/health']
+        healthy_url = urls[1]
+        all_started = threading.Barrier(len(urls))
+        release_slow = threading.Event()
+        finished_slow = []
+        self.addCleanup(release_slow.set)
+
+        def probe(url, headers, expected_status, timeout, expected_regexp):
+            # Every probe is in flight before any of them answers
+            all_started.wait(timeout=5)
+            if url == healthy_url:
+                return {'success': True, 'msg': 'OK', 'url': url}
+            release_slow.wait(timeout=5)
+            finished_slow.append(url)
+            return {'success': False, 'msg': 'Connection refused', 'url': url}
+
+        mock_check.side_effect = probe
+
+        result = probe_urls(urls, headers={}, expected_status=200, timeout=10, expected_regexp=None)
+
+        # probe_urls returned while the failing probes were still blocked
+        self.assertEqual(finished_slow, [])
+        self.assertTrue(result['success'])
+        self.assertEqual(result['url'], healthy_url)
+        self.assertEqual(mock_check.call_count, len(urls))
+
+    @patch('health_check.probe_urls')
+    @patch('health_check.AnsibleModule')
+    def test_empty_urls_fails_cleanly(self, mock_module_cls, mock_probe):
+        """Test an empty urls list is rejected before any probe runs"""
+        module = mock_module_cls.return_value
+        module.params = _module_params(url=None, urls=[], max_retries=1)
+        module.fail_json.side_effect = SystemExit(1)
+
+        with self.assertRaises(SystemExit):
+            main()
+
+        module.fail_json.assert_called_once_with(msg='urls must contain at least one URL')
+        mock_probe.assert_not_called()
+
+    @patch('health_check.probe_urls')
+    @patch('health_check.AnsibleModule')
+    def test_regexp_compiled_once_in_main(self, mock_module_cls, mock_probe):
+        """Test main compiles expected_regexp once and hands the same pattern to every attempt"""
+        module = mock_module_cls.return_value
+        module.params = _module_params(expected_regexp=r'"status":\s*"(OK|healthy)"', max_retries=3)
+        module.fail_json.side_effect = SystemExit(1)
+        mock_probe.return_value = {'success': False, 'msg': 'Connection refused', 'url': module.params['url']}
+
+        with patch('health_check.time.sleep'), patch('health_check.re.compile', wraps=re.compile) as mock_compile:
+            with self.assertRaises(SystemExit):
+                main()
+
+        mock_compile.assert_called_once_with(r'"status":\s*"(OK|healthy)"')
+        patterns = {id(call.kwargs['expected_regexp']) for call in mock_probe.call_args_list}
+        self.assertEqual(mock_probe.call_count, 3)
+        self.assertEqual(len(patterns), 1)
+
+    @patch('health_check.probe_urls')
+    @patch('health_check.AnsibleModule')
+    def test_invalid_regexp_fails_cleanly(self, mock_module_cls, mock_probe):
+        """Test a malformed expected_regexp is reported through fail_json before any probe runs"""
+        module = mock_module_cls.return_value
+        module.params = _module_params(expected_regexp='(')
+        module.fail_json.side_effect = SystemExit(1)
+
+        with self.assertRaises(SystemExit):
+            main()
+
+        module.fail_json.assert_called_once()
+        self.assertIn('Invalid expected_regexp (', module.fail_json.call_args.kwargs['msg'])
+        mock_probe.assert_not_called()
+
+    @patch('health_check.time.sleep')
+    @patch('health_check.probe_urls')
+    @patch('health_check.AnsibleModule')
+    def test_main_sleeps_backed_off_delays(self, mock_module_cls, mock_probe, mock_sleep):
+        """Test main sleeps retry_delay() between attempts, growing up to max_delay"""
+        module = mock_module_cls.return_value
+        module.params = _module_params(delay_between_tries=2, backoff_factor=2, max_delay=5, max_retries=4)
+        module.fail_json.side_effect = SystemExit(1)
+        mock_probe.return_value = {'success': False, 'msg': 'Connection refused', 'url': module.params['url']}
+
+        with self.assertRaises(SystemExit):
+            main()
+
+        # initial_delay first, then one backed-off delay before each retry
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list], [0, 2, 4, 5])
+        self.assertEqual(mock_probe.call_count, 4)
+
+    @patch('health_check.time.sleep')
+    @patch('health_check.probe_urls')
+    @patch('health_check.AnsibleModule')
+    def test_main_rejects_invalid_backoff_options(self, mock_module_cls, mock_probe, mock_sleep):
+        """Test out-of-range jitter, backoff_factor and max_delay fail before any probe runs"""
+        cases = (
+            ('jitter', {'jitter': 1}, 'jitter must be between 0 and 1, got 1'),
+            ('backoff_factor', {'backoff_factor': 0.5}, 'backoff_factor must be at least 1, got 0.5'),
+            ('max_delay', {'max_delay': -1}, 'max_delay must not be negative, got -1'),
+        )
+        module = mock_module_cls.return_value
+        module.fail_json.side_effect = SystemExit(1)
+
+        for name, overrides, msg in cases:
+            with self.subTest(option=name):
+                module.fail_json.reset_mock()
+                module.params = _module_params(**overrides)
+
+                with self.assertRaises(SystemExit):
+                    main()
+
+                module.fail_json.assert_called_once_with(msg=msg)
+        mock_probe.assert_not_called()
+        mock_sleep.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
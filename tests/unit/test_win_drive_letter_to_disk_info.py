@@ -3,27 +3,107 @@
 Unit tests for win_drive_letter_to_disk_info module
 """
 
+import functools
 import os
+import string
+import subprocess
 import sys
 import unittest
-from unittest.mock import patch, MagicMock, Mock
+from types import SimpleNamespace
+from unittest.mock import patch
 import tempfile
 import json
 
-# Add the module path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/modules'))
+# Add the module path unless the module is already importable
+try:
+    import win_drive_letter_to_disk_info  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/modules'))
 
 try:
+    import win_drive_letter_to_disk_info
     from win_drive_letter_to_disk_info import get_disk_info, parse_drive_letter
+    MODULE_AVAILABLE = True
 except ImportError:
-    get_disk_info = None
-    parse_drive_letter = None
+    MODULE_AVAILABLE = False
+    win_drive_letter_to_disk_info = None
+
+
+# Parsed disk info fixtures: a local NVMe system drive, a data drive and a mapped network drive
+_FIXTURES = {
+    'C': {
+        'DriveLetter': 'C',
+        'Size': 500107862016,
+        'FreeSpace': 250053931008,
+        'FileSystem': 'NTFS',
+        'DriveType': 3,
+        'DeviceID': 'C:',
+        'VolumeLabel': 'System',
+        'DiskNumber': 0,
+        'PartitionNumber': 2,
+        'DiskSize': 500107862016,
+        'DiskModel': 'Samsung SSD 970 EVO 500GB',
+        'DiskInterface': 'NVMe'
+    },
+    'D': {
+        'DriveLetter': 'D',
+        'Size': 1000204886016,
+        'FreeSpace': 500102443008,
+        'FileSystem': 'NTFS',
+        'DriveType': 3,
+        'DeviceID': 'D:',
+        'VolumeLabel': 'Data',
+        'DiskNumber': 1,
+        'PartitionNumber': 1
+    },
+    'Z': {
+        'DriveLetter': 'Z',
+        'Size': None,
+        'FreeSpace': None,
+        'FileSystem': 'Network',
+        'DriveType': 4,
+        'DeviceID': 'Z:',
+        'VolumeLabel': 'NetworkShare',
+        'DiskNumber': None,
+        'PartitionNumber': None,
+        'DiskSize': None,
+        'DiskModel': None,
+        'DiskInterface': None
+    }
+}
+
 
+@functools.lru_cache(maxsize=None)
+def _ps_output(letter, as_list=True):
+    """Serialise a fixture once, as a one-element array or, for filtered queries, a bare object"""
+    data = _FIXTURES[letter]
+    return json.dumps([data] if as_list else data, indent=4)
 
+# PowerShell output for drive X with a substitutable DriveType
+_PS_OUT_TEMPLATE = string.Template('''[
+    {
+        "DriveLetter": "X",
+        "Size": 100000000,
+        "FreeSpace": 50000000,
+        "FileSystem": "NTFS",
+        "DriveType": $drive_type,
+        "DeviceID": "X:",
+        "VolumeLabel": "Test",
+        "DiskNumber": 0,
+        "PartitionNumber": 1
+    }
+]''')
+
+
+def _ps_result(stdout, returncode=0, stderr=""):
+    """Build the CompletedProcess that subprocess.run returns for a PowerShell call"""
+    return subprocess.CompletedProcess(args=['powershell.exe'], returncode=returncode, stdout=stdout, stderr=stderr)
+
+
+@unittest.skipUnless(MODULE_AVAILABLE, "Module not available")
 class TestWinDriveLetterToDiskInfo(unittest.TestCase):
     """Test cases for win_drive_letter_to_disk_info module functions"""
 
-    @unittest.skipIf(parse_drive_letter is None, "Module not available")
     def test_parse_drive_letter_valid_formats(self):
         """Test parsing valid drive letter formats"""
         test_cases = [
@@ -40,7 +120,6 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
                 result = parse_drive_letter(input_drive)
                 self.assertEqual(result, expected_output)
 
-    @unittest.skipIf(parse_drive_letter is None, "Module not available")
     def test_parse_drive_letter_invalid_formats(self):
         """Test parsing invalid drive letter formats"""
         test_cases = [
@@ -49,6 +128,8 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
             '1',  # Number
             'C:/',  # With slash
             'C:\\',  # With backslash
+            'C::',  # Repeated colon
+            'É:',  # Non-ASCII letter
             'invalid',  # Word
             None  # None value
         ]
@@ -58,41 +139,18 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
                 with self.assertRaises((ValueError, TypeError)):
                     parse_drive_letter(invalid_input)
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_get_disk_info_success(self, mock_subprocess):
         """Test successful disk info retrieval"""
         # Mock successful PowerShell execution
-        powershell_output = '''
-[
-    {
-        "DriveLetter": "C",
-        "Size": 500107862016,
-        "FreeSpace": 250053931008,
-        "FileSystem": "NTFS",
-        "DriveType": 3,
-        "DeviceID": "C:",
-        "VolumeLabel": "System",
-        "DiskNumber": 0,
-        "PartitionNumber": 2,
-        "DiskSize": 500107862016,
-        "DiskModel": "Samsung SSD 970 EVO 500GB",
-        "DiskInterface": "NVMe"
-    }
-]
-        '''
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = powershell_output.strip()
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result(_ps_output('C'))
 
         result = get_disk_info('C')
 
         self.assertTrue(result['success'])
         self.assertEqual(result['msg'], 'OK')
         self.assertIn('disk_info', result)
+        self.assertEqual(result['disk_info'], _FIXTURES['C'])
         
         disk_info = result['disk_info']
         self.assertEqual(disk_info['DriveLetter'], 'C')
@@ -100,16 +158,58 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
         self.assertEqual(disk_info['FileSystem'], 'NTFS')
         self.assertEqual(disk_info['DiskNumber'], 0)
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
+    @patch('win_drive_letter_to_disk_info.subprocess.run')
+    def test_get_disk_info_skips_powershell_profile(self, mock_subprocess):
+        """Test PowerShell is started without loading user profiles or prompting"""
+        mock_subprocess.return_value = _ps_result("[]")
+
+        get_disk_info('C')
+
+        argv = mock_subprocess.call_args.args[0]
+        self.assertEqual(tuple(argv[:-1]), win_drive_letter_to_disk_info._PS_ARGV)
+        self.assertEqual(argv[0], 'powershell.exe')
+        self.assertIn('-NoProfile', argv)
+        self.assertIn('-NonInteractive', argv)
+        self.assertFalse(mock_subprocess.call_args.kwargs['shell'])
+
+    @patch('win_drive_letter_to_disk_info._drive_exists', return_value=False)
+    @patch('win_drive_letter_to_disk_info.subprocess.run')
+    def test_get_disk_info_short_circuit(self, mock_subprocess, mock_drive_exists):
+        """Test an unassigned drive letter is reported without starting PowerShell"""
+        result = get_disk_info('Q:')
+
+        self.assertFalse(result['success'])
+        self.assertIn('Drive Q: not found', result['msg'])
+        self.assertEqual(result['drive_letter'], 'Q')
+        mock_drive_exists.assert_called_once_with('Q')
+        self.assertEqual(mock_subprocess.call_count, 0)
+
+    def test_drive_exists_logical_drives_mask(self):
+        """Test GetLogicalDrives bits map to drive letters, bit 0 being A:"""
+        drive_exists = win_drive_letter_to_disk_info._drive_exists
+        fake_os = SimpleNamespace(name='nt')
+
+        for mask, present, absent in (
+            ((1 << 2) | (1 << 3) | (1 << 25), 'CDZ', 'ABEY'),
+            (1 << 0, 'A', 'BCZ'),
+            (0, 'ACQZ', ''),  # an empty mask means the call failed, so nothing is ruled out
+        ):
+            fake_ctypes = SimpleNamespace(windll=SimpleNamespace(
+                kernel32=SimpleNamespace(GetLogicalDrives=lambda mask=mask: mask)
+            ))
+            with self.subTest(mask=bin(mask)), \
+                    patch.object(win_drive_letter_to_disk_info, 'os', fake_os), \
+                    patch.dict(sys.modules, {'ctypes': fake_ctypes}):
+                for letter in present:
+                    self.assertTrue(drive_exists(letter), letter)
+                for letter in absent:
+                    self.assertFalse(drive_exists(letter), letter)
+
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_get_disk_info_drive_not_found(self, mock_subprocess):
         """Test disk info retrieval when drive is not found"""
         # Mock PowerShell execution with empty result
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = "[]"
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result("[]")
 
         result = get_disk_info('Z')
 
@@ -117,16 +217,22 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
         self.assertIn('Drive Z: not found', result['msg'])
         self.assertEqual(result['drive_letter'], 'Z')
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
+    @patch('win_drive_letter_to_disk_info.subprocess.run')
+    def test_get_disk_info_empty_output(self, mock_subprocess):
+        """Test an empty PowerShell result is reported as drive not found"""
+        # ConvertTo-Json prints nothing when the filtered query matched no drive
+        mock_subprocess.return_value = _ps_result("")
+
+        result = get_disk_info('Y')
+
+        self.assertFalse(result['success'])
+        self.assertIn('Drive Y: not found', result['msg'])
+
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_get_disk_info_powershell_error(self, mock_subprocess):
         """Test disk info retrieval when PowerShell command fails"""
         # Mock PowerShell execution error
-        mock_result = Mock()
-        mock_result.returncode = 1
-        mock_result.stdout = ""
-        mock_result.stderr = "Access denied"
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result("", returncode=1, stderr="Access denied")
 
         result = get_disk_info('C')
 
@@ -134,97 +240,41 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
         self.assertIn('PowerShell command failed', result['msg'])
         self.assertIn('Access denied', result['msg'])
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_get_disk_info_invalid_json(self, mock_subprocess):
         """Test disk info retrieval when PowerShell returns invalid JSON"""
         # Mock PowerShell execution with invalid JSON
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = "Invalid JSON output"
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result("Invalid JSON output")
 
         result = get_disk_info('C')
 
         self.assertFalse(result['success'])
         self.assertIn('Failed to parse PowerShell output', result['msg'])
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_get_disk_info_multiple_drives(self, mock_subprocess):
-        """Test disk info retrieval with multiple drives in output"""
-        # Mock PowerShell execution with multiple drives
-        powershell_output = '''
-[
-    {
-        "DriveLetter": "C",
-        "Size": 500107862016,
-        "FreeSpace": 250053931008,
-        "FileSystem": "NTFS",
-        "DriveType": 3,
-        "DeviceID": "C:",
-        "VolumeLabel": "System",
-        "DiskNumber": 0,
-        "PartitionNumber": 2
-    },
-    {
-        "DriveLetter": "D",
-        "Size": 1000204886016,
-        "FreeSpace": 500102443008,
-        "FileSystem": "NTFS",
-        "DriveType": 3,
-        "DeviceID": "D:",
-        "VolumeLabel": "Data",
-        "DiskNumber": 1,
-        "PartitionNumber": 1
-    }
-]
-        '''
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = powershell_output.strip()
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        """Test disk info retrieval on a host with multiple drives queries only the requested one"""
+        # WMI filters to the requested drive, so PowerShell emits a single object
+        mock_subprocess.return_value = _ps_result(_ps_output('D', as_list=False))
 
         result = get_disk_info('D')
 
+        # The drive filter is pushed into the WMI query instead of enumerating all disks
+        ps_command = mock_subprocess.call_args.args[0][-1]
+        self.assertIn("-Filter \"DeviceID='D:'\"", ps_command)
+        self.assertNotIn('Where-Object', ps_command)
+
         self.assertTrue(result['success'])
         disk_info = result['disk_info']
         self.assertEqual(disk_info['DriveLetter'], 'D')
         self.assertEqual(disk_info['VolumeLabel'], 'Data')
         self.assertEqual(disk_info['DiskNumber'], 1)
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_get_disk_info_network_drive(self, mock_subprocess):
         """Test disk info retrieval for network drive"""
         # Mock PowerShell execution for network drive
-        powershell_output = '''
-[
-    {
-        "DriveLetter": "Z",
-        "Size": null,
-        "FreeSpace": null,
-        "FileSystem": "Network",
-        "DriveType": 4,
-        "DeviceID": "Z:",
-        "VolumeLabel": "NetworkShare",
-        "DiskNumber": null,
-        "PartitionNumber": null,
-        "DiskSize": null,
-        "DiskModel": null,
-        "DiskInterface": null
-    }
-]
-        '''
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = powershell_output.strip()
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result(_ps_output('Z'))
 
         result = get_disk_info('Z')
 
@@ -236,38 +286,15 @@ class TestWinDriveLetterToDiskInfo(unittest.TestCase):
         self.assertIsNone(disk_info['DiskNumber'])
 
 
+@unittest.skipUnless(MODULE_AVAILABLE, "Module not available")
 class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
     """Integration tests for win_drive_letter_to_disk_info module workflow"""
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_full_workflow_with_valid_drive(self, mock_subprocess):
         """Test complete workflow with valid drive letter"""
         # Mock successful PowerShell execution
-        powershell_output = '''
-[
-    {
-        "DriveLetter": "C",
-        "Size": 500107862016,
-        "FreeSpace": 250053931008,
-        "FileSystem": "NTFS",
-        "DriveType": 3,
-        "DeviceID": "C:",
-        "VolumeLabel": "System",
-        "DiskNumber": 0,
-        "PartitionNumber": 2,
-        "DiskSize": 500107862016,
-        "DiskModel": "Samsung SSD 970 EVO 500GB",
-        "DiskInterface": "NVMe"
-    }
-]
-        '''
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = powershell_output.strip()
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result(_ps_output('C'))
 
         # Test with different input formats
         test_cases = ['C:', 'c:', 'C', 'c']
@@ -289,7 +316,6 @@ class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
                 self.assertIsInstance(disk_info['Size'], int)
                 self.assertIsInstance(disk_info['FreeSpace'], int)
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     def test_error_handling_workflow(self):
         """Test error handling in the complete workflow"""
         # Test invalid drive letter parsing
@@ -300,7 +326,6 @@ class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
         with self.assertRaises((ValueError, TypeError)):
             none_drive = parse_drive_letter(None)
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_disk_size_calculations(self, mock_subprocess):
         """Test disk size and usage calculations"""
@@ -325,11 +350,7 @@ class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
 ]
         '''
         
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = powershell_output.strip()
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
+        mock_subprocess.return_value = _ps_result(powershell_output.strip())
 
         result = get_disk_info('D')
 
@@ -348,7 +369,6 @@ class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
         usage_percent = (calculated_used / disk_info['Size']) * 100
         self.assertAlmostEqual(usage_percent, 75.0, places=1)  # 75% usage
 
-    @unittest.skipIf(get_disk_info is None, "Module not available")
     @patch('win_drive_letter_to_disk_info.subprocess.run')
     def test_drive_type_detection(self, mock_subprocess):
         """Test detection of different drive types"""
@@ -359,29 +379,13 @@ class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
             (2, "Removable disk")   # USB/floppy
         ]
         
+        # One stubbed PowerShell result shared by every case; only stdout changes
+        mock_result = _ps_result('')
+        mock_subprocess.return_value = mock_result
+        
         for drive_type_code, drive_description in drive_types:
             with self.subTest(drive_type=drive_description):
-                powershell_output = f'''
-[
-    {{
-        "DriveLetter": "X",
-        "Size": 100000000,
-        "FreeSpace": 50000000,
-        "FileSystem": "NTFS",
-        "DriveType": {drive_type_code},
-        "DeviceID": "X:",
-        "VolumeLabel": "Test",
-        "DiskNumber": 0,
-        "PartitionNumber": 1
-    }}
-]
-                '''
-                
-                mock_result = Mock()
-                mock_result.returncode = 0
-                mock_result.stdout = powershell_output.strip()
-                mock_result.stderr = ""
-                mock_subprocess.return_value = mock_result
+                mock_result.stdout = _PS_OUT_TEMPLATE.substitute(drive_type=drive_type_code)
 
                 result = get_disk_info('X')
 
@@ -389,6 +393,5 @@ class TestWinDriveLetterToDiskInfoIntegration(unittest.TestCase):
                 disk_info = result['disk_info']
                 self.assertEqual(disk_info['DriveType'], drive_type_code)
 
-
 if __name__ == '__main__':
     unittest.main()
@@ -4,217 +4,215 @@ Unit tests for win_health_check module
 """
 
 import os
+import re
+import subprocess
 import sys
 import unittest
 from unittest.mock import patch, MagicMock, Mock
 import tempfile
 import json
 
+try:
+    # orjson parses faster when it is installed; the output is identical
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # Add the module path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../plugins/modules'))
 
 # Since win_health_check.ps1 is a PowerShell script, we'll test the wrapper/interface
 # and mock the PowerShell execution
+_SCRIPT_PATH = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '..', '..', 'plugins', 'modules', 'win_health_check.ps1'
+))
+_PS_SCRIPT_ARGV = ('powershell.exe', '-File', 'win_health_check.ps1')
+
+
+# Case-insensitive markers the shipped script must contain, found in one pass
+_SCRIPT_TOKENS = frozenset((
+    b'get-ansibleparam',   # Ansible parameter parsing
+    b'invoke-webrequest',  # health check logic
+    b'statuscode',
+    b'exit-json',          # Ansible module functions
+    b'fail-json',
+    b'.synopsis',          # documentation
+))
+_SCRIPT_TOKEN_RE = re.compile(b'|'.join(map(re.escape, sorted(_SCRIPT_TOKENS))))
+
+_HEALTH_URL = "http://localhost:8080/health"
+_HEALTHY_PATTERN = r'"status":\s*"healthy"'
+_HEALTHY_RE = re.compile(_HEALTHY_PATTERN)
+
+# Pre-serialized module outputs as the raw bytes PowerShell writes to the pipe
+_OK_STDOUT = json.dumps({
+    "success": True,
+    "msg": "OK",
+    "actual_status": 200,
+    "expected_status": 200,
+    "url": _HEALTH_URL,
+    "content": '{"status": "healthy"}'
+}).encode('utf-8')
+_REGEX_OK_STDOUT = json.dumps({
+    "success": True,
+    "msg": "OK",
+    "actual_status": 200,
+    "expected_status": 200,
+    "url": _HEALTH_URL,
+    "content": '{"status": "healthy"}',
+    "regex_match": True
+}).encode('utf-8')
+_HTTP500_STDOUT = json.dumps({
+    "success": False,
+    "msg": "Expected status 200, actual: 500",
+    "actual_status": 500,
+    "expected_status": 200,
+    "url": _HEALTH_URL
+}).encode('utf-8')
+_HTTP503_STDOUT = json.dumps({
+    "success": False,
+    "msg": "Service unavailable",
+    "actual_status": 503,
+    "expected_status": 200,
+    "url": _HEALTH_URL
+}).encode('utf-8')
+_CONN_ERR_STDOUT = json.dumps({
+    "success": False,
+    "msg": "Connection error: Unable to connect to remote server",
+    "expected_status": 200,
+    "url": _HEALTH_URL
+}).encode('utf-8')
+_TIMEOUT_STDOUT = json.dumps({
+    "success": False,
+    "msg": "Connection timeout",
+    "expected_status": 200,
+    "url": _HEALTH_URL
+}).encode('utf-8')
+# First two attempts fail, the third succeeds
+_RETRY_SEQ = (_TIMEOUT_STDOUT, _HTTP503_STDOUT, _OK_STDOUT)
+
+
+def _run_ps(args, runner=subprocess.run):
+    """Invoke win_health_check.ps1 with args through runner; tests inject a fake runner"""
+    return runner([*_PS_SCRIPT_ARGV, *args], capture_output=True)
+
+
+def _ps_result(stdout, returncode=0, stderr=b""):
+    """Build the CompletedProcess that subprocess.run returns for a PowerShell call"""
+    return subprocess.CompletedProcess(args=list(_PS_SCRIPT_ARGV), returncode=returncode, stdout=stdout, stderr=stderr)
 
 
 class TestWinHealthCheckModule(unittest.TestCase):
     """Test cases for win_health_check module PowerShell execution"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Read the PowerShell script once; the tests never touch the disk themselves"""
+        try:
+            with open(_SCRIPT_PATH, 'rb') as f:
+                cls._ps_bytes = f.read()
+        except FileNotFoundError:
+            cls._ps_bytes = cls._ps_lower = None
+        else:
+            cls._ps_lower = cls._ps_bytes.lower()
+
+    def setUp(self):
+        """Give each test a fresh fake PowerShell runner"""
+        self.mock_runner = Mock()
+
     def test_powershell_script_exists(self):
         """Test that the PowerShell script file exists"""
-        script_path = os.path.join(
-            os.path.dirname(__file__), 
-            '../../plugins/modules/win_health_check.ps1'
+        self.assertIsNotNone(self._ps_bytes,
+                             f"PowerShell script not found at {_SCRIPT_PATH}")
+
+    def test_powershell_execution_matrix(self):
+        """Test PowerShell script execution outcomes reported on stdout"""
+        basic_args = ('-Url', _HEALTH_URL, '-ExpectedStatus', '200', '-Timeout', '10')
+        cases = (
+            ("ok", basic_args, _OK_STDOUT,
+             {"success": True, "actual_status": 200}),
+            # PowerShell script runs successfully but reports HTTP error
+            ("http500", basic_args, _HTTP500_STDOUT,
+             {"success": False, "actual_status": 500}),
+            ("connection_error", basic_args, _CONN_ERR_STDOUT,
+             {"success": False,
+              "msg": "Connection error: Unable to connect to remote server"}),
+            ("custom_headers", (
+                '-Url', _HEALTH_URL,
+                '-ExpectedStatus', '200',
+                '-Headers', '{"Authorization": "Bearer token123", "Content-Type": "application/json"}',
+                '-Timeout', '30'
+            ), _OK_STDOUT, {"success": True}),
+            ("regex_validation", (
+                '-Url', _HEALTH_URL,
+                '-ExpectedStatus', '200',
+                '-ExpectedRegexp', _HEALTHY_PATTERN,
+                '-Timeout', '10'
+            ), _REGEX_OK_STDOUT, {"success": True, "regex_match": True}),
         )
-        self.assertTrue(os.path.exists(script_path), 
-                       f"PowerShell script not found at {script_path}")
-
-    @patch('subprocess.run')
-    def test_powershell_execution_success(self, mock_subprocess):
-        """Test successful PowerShell script execution"""
-        # Mock successful PowerShell execution
-        expected_result = {
-            "success": True,
-            "msg": "OK",
-            "actual_status": 200,
-            "expected_status": 200,
-            "url": "http://localhost:8080/health",
-            "content": '{"status": "healthy"}'
-        }
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = json.dumps(expected_result)
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
-
-        # Simulate calling PowerShell script
-        import subprocess
-        result = subprocess.run([
-            'powershell.exe', '-File', 'win_health_check.ps1',
-            '-Url', 'http://localhost:8080/health',
-            '-ExpectedStatus', '200',
-            '-Timeout', '10'
-        ], capture_output=True, text=True)
-
-        self.assertEqual(result.returncode, 0)
-        output_data = json.loads(result.stdout)
-        self.assertTrue(output_data['success'])
-        self.assertEqual(output_data['actual_status'], 200)
-
-    @patch('subprocess.run')
-    def test_powershell_execution_http_error(self, mock_subprocess):
-        """Test PowerShell script execution with HTTP error"""
-        # Mock HTTP error response
-        expected_result = {
-            "success": False,
-            "msg": "Expected status 200, actual: 500",
-            "actual_status": 500,
-            "expected_status": 200,
-            "url": "http://localhost:8080/health"
-        }
-        
-        mock_result = Mock()
-        mock_result.returncode = 0  # PowerShell script runs successfully but reports HTTP error
-        mock_result.stdout = json.dumps(expected_result)
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
-
-        # Simulate calling PowerShell script
-        import subprocess
-        result = subprocess.run([
-            'powershell.exe', '-File', 'win_health_check.ps1',
-            '-Url', 'http://localhost:8080/health',
-            '-ExpectedStatus', '200',
-            '-Timeout', '10'
-        ], capture_output=True, text=True)
-
-        self.assertEqual(result.returncode, 0)
-        output_data = json.loads(result.stdout)
-        self.assertFalse(output_data['success'])
-        self.assertEqual(output_data['actual_status'], 500)
-
-    @patch('subprocess.run')
-    def test_powershell_execution_connection_error(self, mock_subprocess):
-        """Test PowerShell script execution with connection error"""
-        # Mock connection error
-        expected_result = {
-            "success": False,
-            "msg": "Connection error: Unable to connect to remote server",
-            "expected_status": 200,
-            "url": "http://localhost:8080/health"
-        }
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = json.dumps(expected_result)
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
-
-        # Simulate calling PowerShell script
-        import subprocess
-        result = subprocess.run([
-            'powershell.exe', '-File', 'win_health_check.ps1',
-            '-Url', 'http://localhost:8080/health',
-            '-ExpectedStatus', '200',
-            '-Timeout', '10'
-        ], capture_output=True, text=True)
-
-        self.assertEqual(result.returncode, 0)
-        output_data = json.loads(result.stdout)
-        self.assertFalse(output_data['success'])
-        self.assertIn('Connection error', output_data['msg'])
-
-    @patch('subprocess.run')
-    def test_powershell_script_execution_error(self, mock_subprocess):
+
+        for name, args, stdout, expected in cases:
+            with self.subTest(case=name):
+                self.mock_runner.return_value = _ps_result(stdout)
+
+                # Simulate calling PowerShell script
+                result = _run_ps(args, runner=self.mock_runner)
+
+                self.assertEqual(result.returncode, 0)
+                output_data = json_loads(result.stdout)
+                self.assertEqual({key: output_data.get(key) for key in expected}, expected)
+                if '-ExpectedRegexp' in args:
+                    self.assertRegex(output_data['content'], _HEALTHY_RE)
+
+    def test_powershell_script_execution_error(self):
         """Test PowerShell script execution failure"""
         # Mock PowerShell execution error
-        mock_result = Mock()
-        mock_result.returncode = 1
-        mock_result.stdout = ""
-        mock_result.stderr = "PowerShell script error: Invalid parameter"
-        mock_subprocess.return_value = mock_result
+        self.mock_runner.return_value = _ps_result(
+            b"", returncode=1, stderr=b"PowerShell script error: Invalid parameter"
+        )
 
         # Simulate calling PowerShell script with invalid parameters
-        import subprocess
-        result = subprocess.run([
-            'powershell.exe', '-File', 'win_health_check.ps1',
+        result = _run_ps([
             '-InvalidParam', 'value'
-        ], capture_output=True, text=True)
+        ], runner=self.mock_runner)
 
         self.assertEqual(result.returncode, 1)
-        self.assertIn('PowerShell script error', result.stderr)
+        self.assertIn(b'PowerShell script error', result.stderr)
 
     def test_powershell_script_content_validation(self):
         """Test that PowerShell script contains expected functions and parameters"""
-        script_path = os.path.join(
-            os.path.dirname(__file__), 
-            '../../plugins/modules/win_health_check.ps1'
-        )
-        
-        if os.path.exists(script_path):
-            with open(script_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check for expected PowerShell elements (case-insensitive)
-            content_lower = content.lower()
-            
-            # Check for Ansible parameter parsing
-            self.assertIn('get-ansibleparam', content_lower)
-            self.assertIn('$url', content)
-            self.assertIn('$expectedstatus', content_lower.replace('_', ''))
-            self.assertIn('$timeout', content)
-            
-            # Check for health check logic
-            self.assertIn('invoke-webrequest', content_lower)
-            self.assertIn('statuscode', content_lower)
-            
-            # Check for Ansible module functions
-            self.assertIn('exit-json', content_lower)
-            self.assertIn('fail-json', content_lower)
-            
-            # Check for documentation
-            self.assertIn('.synopsis', content_lower)
+        if self._ps_bytes is None:
+            self.skipTest(f"PowerShell script not found at {_SCRIPT_PATH}")
+
+        content = self._ps_bytes
+        content_lower = self._ps_lower
+
+        found = {m.group() for m in _SCRIPT_TOKEN_RE.finditer(content_lower)}
+        self.assertEqual(found, _SCRIPT_TOKENS)
+
+        # Check for the module parameters
+        self.assertIn(b'$url', content)
+        self.assertIn(b'$expectedstatus', content_lower.replace(b'_', b''))
+        self.assertIn(b'$timeout', content)
 
 
 class TestWinHealthCheckIntegration(unittest.TestCase):
     """Integration tests for win_health_check PowerShell module"""
 
-    @patch('subprocess.run')
-    def test_retry_workflow_powershell(self, mock_subprocess):
+    def setUp(self):
+        """Fake the PowerShell runner and keep retry loops from sleeping"""
+        self.mock_runner = Mock()
+        sleep_patcher = patch('time.sleep')
+        self.mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_retry_workflow_powershell(self):
         """Test retry workflow with PowerShell health check"""
         # Mock multiple calls - first two fail, third succeeds
-        call_results = [
-            # First call - connection error
-            Mock(returncode=0, stdout=json.dumps({
-                "success": False,
-                "msg": "Connection timeout",
-                "expected_status": 200,
-                "url": "http://localhost:8080/health"
-            }), stderr=""),
-            # Second call - still failing
-            Mock(returncode=0, stdout=json.dumps({
-                "success": False,
-                "msg": "Service unavailable",
-                "actual_status": 503,
-                "expected_status": 200,
-                "url": "http://localhost:8080/health"
-            }), stderr=""),
-            # Third call - success
-            Mock(returncode=0, stdout=json.dumps({
-                "success": True,
-                "msg": "OK",
-                "actual_status": 200,
-                "expected_status": 200,
-                "url": "http://localhost:8080/health",
-                "content": '{"status": "healthy"}'
-            }), stderr="")
-        ]
-        
-        mock_subprocess.side_effect = call_results
+        self.mock_runner.side_effect = [_ps_result(stdout) for stdout in _RETRY_SEQ]
 
         # Simulate retry logic
-        import subprocess
         import time
         
         max_retries = 3
@@ -225,87 +223,22 @@ class TestWinHealthCheckIntegration(unittest.TestCase):
             if attempt > 0:
                 time.sleep(delay_between_tries)
             
-            result = subprocess.run([
-                'powershell.exe', '-File', 'win_health_check.ps1',
-                '-Url', 'http://localhost:8080/health',
+            result = _run_ps([
+                '-Url', _HEALTH_URL,
                 '-ExpectedStatus', '200',
                 '-Timeout', '10'
-            ], capture_output=True, text=True)
+            ], runner=self.mock_runner)
             
             if result.returncode == 0:
-                output_data = json.loads(result.stdout)
+                output_data = json_loads(result.stdout)
                 if output_data.get('success'):
                     success = True
                     break
 
         self.assertTrue(success)
-        self.assertEqual(mock_subprocess.call_count, 3)
-
-    @patch('subprocess.run')
-    def test_custom_headers_powershell(self, mock_subprocess):
-        """Test PowerShell health check with custom headers"""
-        expected_result = {
-            "success": True,
-            "msg": "OK",
-            "actual_status": 200,
-            "expected_status": 200,
-            "url": "http://localhost:8080/health",
-            "content": '{"status": "healthy"}'
-        }
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = json.dumps(expected_result)
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
-
-        # Simulate calling PowerShell script with custom headers
-        import subprocess
-        result = subprocess.run([
-            'powershell.exe', '-File', 'win_health_check.ps1',
-            '-Url', 'http://localhost:8080/health',
-            '-ExpectedStatus', '200',
-            '-Headers', '{"Authorization": "Bearer token123", "Content-Type": "application/json"}',
-            '-Timeout', '30'
-        ], capture_output=True, text=True)
-
-        self.assertEqual(result.returncode, 0)
-        output_data = json.loads(result.stdout)
-        self.assertTrue(output_data['success'])
-
-    @patch('subprocess.run')
-    def test_regex_validation_powershell(self, mock_subprocess):
-        """Test PowerShell health check with regex validation"""
-        expected_result = {
-            "success": True,
-            "msg": "OK",
-            "actual_status": 200,
-            "expected_status": 200,
-            "url": "http://localhost:8080/health",
-            "content": '{"status": "healthy"}',
-            "regex_match": True
-        }
-        
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = json.dumps(expected_result)
-        mock_result.stderr = ""
-        mock_subprocess.return_value = mock_result
-
-        # Simulate calling PowerShell script with regex validation
-        import subprocess
-        result = subprocess.run([
-            'powershell.exe', '-File', 'win_health_check.ps1',
-            '-Url', 'http://localhost:8080/health',
-            '-ExpectedStatus', '200',
-            '-ExpectedRegexp', r'"status":\s*"healthy"',
-            '-Timeout', '10'
-        ], capture_output=True, text=True)
-
-        self.assertEqual(result.returncode, 0)
-        output_data = json.loads(result.stdout)
-        self.assertTrue(output_data['success'])
-        self.assertTrue(output_data.get('regex_match', False))
+        self.assertEqual(self.mock_runner.call_count, 3)
+        self.assertEqual(self.mock_sleep.call_count, 2)
+        self.mock_sleep.assert_any_call(delay_between_tries)
 
 
 if __name__ == '__main__':
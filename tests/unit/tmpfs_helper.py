@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Temp root selection shared by the unit tests that create many small files
+"""
+
+import os
+
+# RAM-backed temp root used for test files when available (Linux)
+TMPFS_ROOT = '/dev/shm'
+
+
+def fast_tmp_root():
+    """Return the temp root for test files, or None to use tempfile's default
+
+    An explicit TMPDIR always wins; otherwise a writable tmpfs is preferred.
+    """
+    if 'TMPDIR' in os.environ:
+        return None
+    if os.path.isdir(TMPFS_ROOT) and os.access(TMPFS_ROOT, os.W_OK):
+        return TMPFS_ROOT
+    return None